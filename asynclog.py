@@ -0,0 +1,133 @@
+import queue
+import threading
+
+# Control messages for the writer thread
+_FLUSH = object()
+_STOP = object()
+
+POLL = 0.1   # seconds between liveness checks while waiting on the writer
+
+
+class AsyncAppender:
+    """Appends text to files from a background thread
+
+    write() only puts (path, text) on a bounded queue; the writer thread
+    drains whatever is waiting (up to batch_size items), groups it per file
+    and appends each group with a single write.  Files stay open between
+    batches.  When the queue is full, write() drops the entry and counts it
+    in .dropped rather than waiting, so slow disks never stall the caller
+    and memory stays bounded; block=True waits for room instead, for lines
+    that must not be lost.  I/O errors are kept in .error; once the
+    writer thread has died, write() and flush() raise it.
+    """
+    def __init__(self, capacity=10000, batch_size=512):
+        self.queue = queue.Queue(capacity)
+        self.batch_size = batch_size
+        self.handles = {}
+        self.error = None
+        self.dropped = 0
+        self.thread = threading.Thread(target=self.run, name="AsyncAppender", daemon=True)
+        self.thread.start()
+
+    def check(self):
+        if not self.thread.is_alive():
+            raise self.error or RuntimeError("AsyncAppender writer thread has stopped")
+
+    def put(self, item):
+        """Queue a control item, waiting for room but not on a dead writer"""
+        while True:
+            self.check()
+            try:
+                self.queue.put(item, timeout=POLL)
+                return
+            except queue.Full:
+                pass
+
+    def write(self, path, text, block=False):
+        if block:
+            self.put((path, text, False))
+            return
+        self.check()
+        try:
+            self.queue.put_nowait((path, text, False))
+        except queue.Full:
+            self.dropped += 1
+
+    def reset(self, path, text=""):
+        """Truncate path and start it with text (e.g. a CSV header)"""
+        self.put((path, text, True))
+
+    def flush(self, timeout=None):
+        """Block until everything queued so far is on disk (False on timeout)"""
+        done = threading.Event()
+        self.put((_FLUSH, done, False))
+        waited = 0.0
+        while not done.wait(POLL):
+            self.check()
+            waited += POLL
+            if timeout is not None and waited >= timeout:
+                return False
+        return True
+
+    def close(self):
+        """Write out the queue, stop the thread and close the files"""
+        if self.thread.is_alive():
+            self.queue.put((_STOP, None, False))
+            self.thread.join()
+
+    # ----- writer thread -----
+    def run(self):
+        try:
+            while True:
+                batch = [self.queue.get()]
+                while len(batch) < self.batch_size:
+                    try:
+                        batch.append(self.queue.get_nowait())
+                    except queue.Empty:
+                        break
+                if not self.write_batch(batch):
+                    return
+        except Exception as error:
+            self.error = error
+            raise
+        finally:
+            for handle in self.handles.values():
+                handle.close()
+            self.handles.clear()
+
+    def write_batch(self, batch):
+        """Write one batch in order; returns False once a stop was seen"""
+        pending = {}
+        for path, payload, truncate in batch:
+            if path is _FLUSH or path is _STOP:
+                self.write_pending(pending)
+                pending = {}
+                if path is _STOP:
+                    return False
+                payload.set()
+            elif truncate:
+                pending.pop(path, None)
+                if path in self.handles:
+                    self.handles.pop(path).close()
+                try:
+                    self.handles[path] = open(path, "w")
+                except OSError as error:
+                    self.error = error
+                    continue
+                pending[path] = [payload]
+            else:
+                pending.setdefault(path, []).append(payload)
+        self.write_pending(pending)
+        return True
+
+    def write_pending(self, pending):
+        for path, parts in pending.items():
+            try:
+                handle = self.handles.get(path)
+                if handle is None:
+                    handle = self.handles[path] = open(path, "a")
+                handle.write("".join(parts))
+                handle.flush()
+            except OSError as error:
+                # Keep serving; the owner can inspect .error
+                self.error = error
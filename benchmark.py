@@ -0,0 +1,242 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from myqueue import Queue
+from traffic_manager import CarLogic, TrafficManager
+
+SIZES = [100, 1000, 10000]
+DIRECTIONS = ["up", "down", "left", "right"]
+LANE_TYPES = ["straight", "turn"]
+APPROACH_STEPS = 70   # CAR_SPEED steps from a spawn point to just short of the stop line
+
+# Metrics where a larger number is better; everything else is a latency or a size
+HIGHER_IS_BETTER = {"ops_per_s"}
+GATED = ("p50_us", "ops_per_s", "bytes_per_car")
+
+
+# ================= SETUP =================
+def seeded_manager(count, seed=0):
+    """TrafficManager with `count` cars spread along every approach lane
+
+    The screen only fits about a hundred cars without overlap, so larger
+    sizes stack several cars per slot; that is fine for timing purposes.
+    """
+    rng = random.Random(seed)
+    manager = TrafficManager(input_file=None, rng=rng)
+    for i in range(count):
+        car = manager.spawn_car(DIRECTIONS[i % 4], LANE_TYPES[(i // 4) % 2])
+        for _ in range(rng.randrange(APPROACH_STEPS)):
+            car.move()
+        manager.lane_index.update(car)
+        manager.occupancy.update(car)
+    return manager
+
+
+def summarize(samples_ns):
+    """Latency percentiles (microseconds) for a list of nanosecond samples"""
+    ordered = sorted(samples_ns)
+    last = len(ordered) - 1
+
+    def pick(q):
+        return ordered[round(q * last)] / 1000
+
+    return {
+        "p50_us": pick(0.50),
+        "p90_us": pick(0.90),
+        "p99_us": pick(0.99),
+        "max_us": ordered[-1] / 1000,
+        "mean_us": sum(ordered) / len(ordered) / 1000,
+        "samples": len(ordered),
+    }
+
+# ================= BENCHMARKS =================
+def bench_update(count, ticks):
+    """Full update() per tick"""
+    manager = seeded_manager(count)
+    samples = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(ticks):
+            start = time.perf_counter_ns()
+            manager.update()
+            samples.append(time.perf_counter_ns() - start)
+    return summarize(samples)
+
+
+def bench_per_car(count, ticks, call):
+    """One call per car, timed as a whole pass (= that call's cost per tick)"""
+    manager = seeded_manager(count)
+    cars = list(manager.cars)
+    samples = []
+    for _ in range(ticks):
+        start = time.perf_counter_ns()
+        for car in cars:
+            call(manager, car)
+        samples.append(time.perf_counter_ns() - start)
+    return summarize(samples)
+
+
+def call_find_car_ahead(manager, car):
+    manager.find_car_ahead(car)
+
+
+def call_can_move(manager, car):
+    manager.can_move(car, manager.find_car_ahead(car))
+
+
+def call_is_intersection_blocked(manager, car):
+    manager.is_intersection_blocked(car)
+
+
+def bench_read_generator(count, ticks):
+    """Parse and spawn `count` freshly appended input lines"""
+    lines = "".join(f"{DIRECTIONS[i % 4]},{LANE_TYPES[(i // 4) % 2]}\n" for i in range(count))
+    samples = []
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "input.txt")
+        for _ in range(ticks):
+            open(path, "w").close()
+            manager = TrafficManager(input_file=path, rng=random.Random(0))
+            with open(path, "a") as f:
+                f.write(lines)
+            start = time.perf_counter_ns()
+            manager.read_generator()
+            samples.append(time.perf_counter_ns() - start)
+            manager.close()
+            assert len(manager.cars) == count
+    return summarize(samples)
+
+
+def bench_queue(count, repeats):
+    """myqueue.Queue enqueue/dequeue throughput at a given depth"""
+    results = {}
+    for name in ("enqueue", "dequeue"):
+        best = None
+        for _ in range(repeats):
+            queue = Queue()
+            if name == "dequeue":
+                for i in range(count):
+                    queue.enqueue(i)
+            start = time.perf_counter_ns()
+            if name == "enqueue":
+                for i in range(count):
+                    queue.enqueue(i)
+            else:
+                for _ in range(count):
+                    queue.dequeue()
+            elapsed = time.perf_counter_ns() - start
+            best = elapsed if best is None else min(best, elapsed)
+        results[name] = {"ops_per_s": count / (best / 1e9)}
+    return results
+
+
+def bench_memory(count):
+    """Heap bytes held by `count` live cars (tracemalloc), per car"""
+    rng = random.Random(0)
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        cars = [CarLogic(i, DIRECTIONS[i % 4], LANE_TYPES[(i // 4) % 2], rng)
+                for i in range(count)]
+        used = tracemalloc.get_traced_memory()[0] - before
+        del cars
+    finally:
+        tracemalloc.stop()
+    return {"bytes_per_car": used / count, "total_kib": used / 1024}
+
+
+def run_suite(sizes, ticks):
+    results = {}
+
+    def add(name, size, summary):
+        results.setdefault(name, {})[str(size)] = summary
+        print(f"  {name:<26} N={size:<6} " +
+              ", ".join(f"{k}={v:.1f}" for k, v in summary.items() if k != "samples"))
+
+    for size in sizes:
+        add("update", size, bench_update(size, ticks))
+        add("find_car_ahead", size, bench_per_car(size, ticks, call_find_car_ahead))
+        add("can_move", size, bench_per_car(size, ticks, call_can_move))
+        add("is_intersection_blocked", size,
+            bench_per_car(size, ticks, call_is_intersection_blocked))
+        add("read_generator", size, bench_read_generator(size, max(5, ticks // 5)))
+        add("car_memory", size, bench_memory(size))
+        for name, summary in bench_queue(size * 10, 5).items():
+            add(f"queue_{name}", size * 10, summary)
+    return results
+
+# ================= COMPARE =================
+def compare(baseline, current, threshold):
+    """Return a list of (benchmark, size, metric, old, new, change) regressions"""
+    regressions = []
+    for name, by_size in current["results"].items():
+        for size, metrics in by_size.items():
+            old_metrics = baseline["results"].get(name, {}).get(size)
+            if old_metrics is None:
+                continue
+            # Medians only: tail percentiles are too noisy to gate on
+            for metric in GATED:
+                if metric not in metrics or metric not in old_metrics:
+                    continue
+                old, new = old_metrics[metric], metrics[metric]
+                if not old:
+                    continue
+                change = (new - old) / old
+                worse = -change if metric in HIGHER_IS_BETTER else change
+                marker = "REGRESSION" if worse > threshold else ""
+                print(f"  {name:<26} N={size:<6} {metric:<10} {old:>12.1f} -> {new:>12.1f} "
+                      f"({change:+.0%}) {marker}")
+                if marker:
+                    regressions.append((name, size, metric, old, new, change))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="TrafficManager and Queue benchmarks")
+    parser.add_argument("--sizes", default=",".join(map(str, SIZES)),
+                        help="comma separated car counts")
+    parser.add_argument("--ticks", type=int, default=50, help="timed ticks per benchmark")
+    parser.add_argument("--output", default="benchmark.json", help="where to write results")
+    parser.add_argument("--baseline", default=None,
+                        help="compare against this earlier results file")
+    parser.add_argument("--threshold", type=float, default=0.15,
+                        help="relative slowdown that counts as a regression")
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(",")]
+    print("Running benchmarks...")
+    report = {
+        "meta": {
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "ticks": args.ticks,
+            "sizes": sizes,
+        },
+        "results": run_suite(sizes, args.ticks),
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        print(f"\nComparing against {args.baseline} (threshold {args.threshold:.0%}):")
+        regressions = compare(baseline, report, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) found")
+            sys.exit(1)
+        print("\nNo regressions")
+
+
+if __name__ == "__main__":
+    main()
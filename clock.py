@@ -0,0 +1,54 @@
+import time
+
+
+class WallClock:
+    """Real time: sleep() blocks the caller"""
+    def now(self):
+        return time.time()
+
+    def sleep(self, seconds):
+        if seconds > 0:
+            time.sleep(seconds)
+
+    def strftime(self, fmt):
+        return time.strftime(fmt, time.localtime(self.now()))
+
+
+class VirtualClock:
+    """Simulated time: sleep() and advance_to() jump forward instantly"""
+    def __init__(self, start=None):
+        # Start at the current date so log timestamps still look sensible
+        self.time = time.time() if start is None else start
+        self.start = self.time
+
+    def now(self):
+        return self.time
+
+    def sleep(self, seconds):
+        if seconds > 0:
+            self.time += seconds
+
+    def advance_to(self, when):
+        """Jump to an absolute time (never backwards)"""
+        if when > self.time:
+            self.time = when
+
+    def elapsed(self):
+        return self.time - self.start
+
+    def strftime(self, fmt):
+        return time.strftime(fmt, time.localtime(self.now()))
+
+
+class ScaledClock(WallClock):
+    """Real time sped up: sleep(n) blocks for n / speed seconds"""
+    def __init__(self, speed=1.0):
+        self.speed = speed
+        self.origin = time.time()
+
+    def now(self):
+        return self.origin + (time.time() - self.origin) * self.speed
+
+    def sleep(self, seconds):
+        if seconds > 0:
+            time.sleep(seconds / self.speed)
@@ -0,0 +1,273 @@
+import argparse
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+
+# ================= STRATEGIES =================
+class Controller:
+    """Chooses the next green phase whenever the current one runs out
+
+    decide(queues, current, elapsed) gets the number of vehicles waiting per
+    phase, the phase that is green now (None at the start) and how long it
+    has been green, and returns (next_phase, duration).  Returning the
+    current phase extends it.  Times are in the host's unit: milliseconds for
+    TrafficManager, seconds for the queue simulator; `timing` holds:
+
+      time_per_vehicle  time for one waiting vehicle to clear the stop line
+      min_green         shortest green
+      max_green         longest continuous green (actuated, longest queue)
+      startup_buffer    added to queue-based greens
+      gap               extension per check while vehicles keep coming (actuated)
+      period            fixed decision interval (max pressure)
+      priority_phase, priority_threshold, priority_release, priority_extra
+                        the priority override every strategy applies first
+
+    The priority phase need not be in `order`: it then only ever gets the
+    green through the override.  Subclasses implement choose().
+
+    `counts` tells TrafficManager what to put in `queues`: "approach" is
+    every straight vehicle stopped on the approach, "stop_line" only the
+    vehicles held at the line (the original lane_queues).  The queue
+    simulator always passes its road queue lengths.
+
+    `downstream(phase)`, if given, returns how many vehicles are queued where
+    that phase's traffic goes next (the neighbouring intersection in
+    network.py); strategies that do not look downstream ignore it.
+    """
+    name = None
+    counts = "approach"
+
+    def __init__(self, order, timing, log=None, downstream=None):
+        self.order = list(order)     # rotation order of the phases
+        self.timing = timing
+        self.log = log               # called with mode-change messages
+        self.downstream = downstream
+        self.last_index = -1         # position in order of the last rotated phase
+
+    def next_in_order(self, current):
+        if current in self.order:
+            self.last_index = self.order.index(current)
+        self.last_index = (self.last_index + 1) % len(self.order)
+        return self.order[self.last_index]
+
+    def queue_green(self, waiting):
+        """Green long enough to clear `waiting` vehicles, within min/max"""
+        timing = self.timing
+        if waiting <= 0:
+            return timing["min_green"]
+        needed = waiting * timing["time_per_vehicle"] + timing["startup_buffer"]
+        return min(max(timing["min_green"], needed), timing["max_green"])
+
+    def decide(self, queues, current, elapsed):
+        """The priority override when it applies, otherwise the strategy's choice"""
+        timing = self.timing
+        priority = timing["priority_phase"]
+        count = queues.get(priority, 0)
+        if priority is not None and count > timing["priority_threshold"]:
+            if current != priority:
+                if self.log:
+                    self.log(f"⚠️ PRIORITY MODE: {count} cars in {priority.upper()}")
+                return priority, count * timing["time_per_vehicle"] + timing["priority_extra"]
+            if count < timing["priority_release"]:
+                if self.log:
+                    self.log("✓ Priority cleared, resuming normal cycle")
+                return self.next_in_order(current), timing["min_green"]
+            return current, timing["time_per_vehicle"] * 3
+        return self.choose(queues, current, elapsed)
+
+    def choose(self, queues, current, elapsed):
+        raise NotImplementedError
+
+
+class RoundRobinPriority(Controller):
+    """Fixed rotation with queue-sized greens
+
+    Together with the priority override this is the original TrafficManager
+    policy: the next phase in order gets
+    waiting * time_per_vehicle + startup_buffer, at least min_green.
+    """
+    name = "round_robin"
+    counts = "stop_line"
+
+    def choose(self, queues, current, elapsed):
+        timing = self.timing
+        phase = self.next_in_order(current)
+        waiting = queues[phase]
+        if waiting > 0:
+            return phase, max(timing["min_green"], waiting * timing["time_per_vehicle"] +
+                              timing["startup_buffer"])
+        return phase, timing["min_green"]
+
+
+class LongestQueueFirst(Controller):
+    """Green to the phase with the most vehicles waiting, sized to clear it"""
+    name = "longest_queue"
+
+    def choose(self, queues, current, elapsed):
+        # Ties go to the phase that comes first after the current one
+        start = self.order.index(current) + 1 if current in self.order else 0
+        rotation = self.order[start:] + self.order[:start]
+        phase = max(rotation, key=lambda p: queues.get(p, 0))
+        if queues.get(phase, 0) == 0:
+            phase = self.next_in_order(current)
+        return phase, self.queue_green(queues.get(phase, 0))
+
+
+class MaxPressure(Controller):
+    """Every `period`, green to the phase with the highest pressure
+
+    Pressure is vehicles waiting minus vehicles queued downstream of the
+    phase (`downstream(phase)`).  Without a downstream source (an isolated
+    intersection) that is just the local queue, so this is longest queue
+    first re-decided every period.  The current phase wins ties, so a busy
+    approach can keep the green for several periods without paying the
+    switching cost.
+    """
+    name = "max_pressure"
+
+    def pressure(self, queues, phase):
+        blocked = self.downstream(phase) if self.downstream is not None else 0
+        return queues.get(phase, 0) - blocked
+
+    def choose(self, queues, current, elapsed):
+        best = current if current in self.order else self.order[0]
+        for phase in self.order:
+            if self.pressure(queues, phase) > self.pressure(queues, best):
+                best = phase
+        if self.pressure(queues, best) <= 0:
+            best = self.next_in_order(current)
+        return best, self.timing["period"]
+
+
+class ActuatedGapOut(Controller):
+    """Actuated control: extend the green while vehicles keep using it
+
+    Each green runs at least min_green, then grows by `gap` at a time while
+    its phase still has vehicles waiting, up to max_green.  When it gaps out
+    (or maxes out) the next phase in order that has demand gets the green;
+    empty phases are skipped.
+    """
+    name = "actuated"
+
+    def choose(self, queues, current, elapsed):
+        timing = self.timing
+        if current in self.order and queues.get(current, 0) > 0 and elapsed < timing["max_green"]:
+            return current, min(timing["gap"], timing["max_green"] - elapsed)
+
+        for _ in self.order:
+            phase = self.next_in_order(current)
+            if phase != current and queues.get(phase, 0) > 0:
+                return phase, timing["min_green"]
+            current = phase
+        return self.next_in_order(current), timing["min_green"]
+
+
+CONTROLLERS = {
+    cls.name: cls for cls in (RoundRobinPriority, LongestQueueFirst, MaxPressure, ActuatedGapOut)
+}
+
+
+def make_controller(controller, order, timing, log=None, downstream=None):
+    """A Controller from a name in CONTROLLERS (or an instance, returned as is)"""
+    if isinstance(controller, Controller):
+        return controller
+    if controller not in CONTROLLERS:
+        raise ValueError(f"unknown controller {controller!r} (choose from {sorted(CONTROLLERS)})")
+    return CONTROLLERS[controller](order, timing, log, downstream)
+
+# ================= EVALUATION =================
+def evaluate_one(job):
+    """Run one strategy on one seed in a worker process"""
+    target, name, seed, minutes = job
+    if target == "headless":
+        import headless
+        from traffic_manager import TICK_MS
+        ticks = int(minutes * 60000 / TICK_MS)
+        longest = [0]   # most straight cars stopped on one approach
+
+        def watch(manager, tick):
+            longest[0] = max(longest[0], max(manager.waiting.values()))
+
+        summary = headless.run(ticks, seed=seed, config={"controller": name, "verbose": False},
+                               on_tick=watch)
+        summary["max_queue"] = longest[0]
+        served = summary["throughput_per_min"] * minutes
+    else:
+        from clock import VirtualClock
+        from headless import RandomArrivals
+        from simulator import Simulator
+        sim = Simulator(clock=VirtualClock(), input_file=None, log_file=None,
+                        history_file=None, verbose=False, config={"controller": name})
+        arrivals = RandomArrivals(random.Random(seed))
+        while sim.elapsed() < minutes * 60:
+            sim.run(1, arrivals)
+        served = sim.total_served
+        summary = {
+            "mean_wait": sim.stats.all.running.mean,
+            "p95_wait": sim.stats.all.quantiles["p95"].value(),
+            "max_queue": max(sim.stats.max_queue.values()),
+        }
+    return {
+        "served_per_hour": served * 60 / minutes,
+        "mean_wait": summary["mean_wait"],
+        "p95_wait": summary["p95_wait"],
+        "max_queue": summary["max_queue"],
+    }
+
+
+def evaluate(target, names, seeds, minutes, workers=None):
+    """Every strategy on the same seeded demand, in parallel; one row per strategy"""
+    jobs = [(target, name, seed, minutes) for name in names for seed in seeds]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(evaluate_one, jobs))
+
+    rows = []
+    for i, name in enumerate(names):
+        runs = results[i * len(seeds):(i + 1) * len(seeds)]
+        row = {"controller": name}
+        for metric in runs[0]:
+            values = [run[metric] for run in runs]
+            row[metric] = max(values) if metric == "max_queue" else sum(values) / len(values)
+        rows.append(row)
+    return rows
+
+
+def main():
+    from sweep import print_table, save
+
+    parser = argparse.ArgumentParser(description="Compare signal control strategies")
+    parser.add_argument("--target", choices=["headless", "simulator"], default="headless",
+                        help="TrafficManager (headless) or the queue simulator")
+    parser.add_argument("--controllers", default=",".join(CONTROLLERS),
+                        help="comma separated strategies to compare")
+    parser.add_argument("--seeds", type=int, default=3, help="replications per strategy")
+    parser.add_argument("--seed", type=int, default=0, help="first demand seed")
+    parser.add_argument("--minutes", type=float, default=30, help="simulated minutes per run")
+    parser.add_argument("--workers", type=int, default=None, help="default: all cores")
+    parser.add_argument("--output", default=None, help="write the table as .csv or .json")
+    args = parser.parse_args()
+
+    names = args.controllers.split(",")
+    for name in names:
+        if name not in CONTROLLERS:
+            raise SystemExit(f"unknown controller {name} (choose from {sorted(CONTROLLERS)})")
+    seeds = list(range(args.seed, args.seed + args.seeds))
+
+    print(f"Running {len(names)} strategies x {len(seeds)} seeds x {args.minutes:g} min "
+          f"on {args.workers or os.cpu_count()} workers...")
+    started = time.perf_counter()
+    rows = evaluate(args.target, names, seeds, args.minutes, args.workers)
+    rows.sort(key=lambda row: -row["served_per_hour"])
+    print(f"Done in {time.perf_counter() - started:.1f} s\n")
+
+    columns = ["controller", "served_per_hour", "mean_wait", "p95_wait", "max_queue"]
+    print_table(rows, columns)
+    if args.output:
+        save(rows, columns, args.output)
+        print(f"\nResults written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+import mmap
+import os
+import struct
+from array import array
+
+# ================= FORMAT =================
+# Spill file = 8-byte header + fixed-size little-endian records.
+#   header: magic, format version, record size (same layout as records.py)
+#   record: time (float64 epoch seconds), served (uint32),
+#           road code, priority flag (uint8 each), padding
+MAGIC = b"TVCY"
+VERSION = 1
+HEADER = struct.Struct("<4sHH")
+RECORD = struct.Struct("<dIBBxx")
+
+ROADS = ["A", "B", "C", "D", "AL2"]
+ROAD_CODES = {name: code for code, name in enumerate(ROADS)}
+
+CAPACITY = 4096       # cycles kept in memory
+SPILL_BATCH = 256     # evicted cycles written per append
+
+
+def record_dtype():
+    """numpy dtype matching RECORD (numpy is only needed for queries)"""
+    import numpy as np
+    return np.dtype([
+        ("time", "<f8"), ("served", "<u4"), ("road", "u1"),
+        ("priority", "u1"), ("pad", "u2")
+    ])
+
+
+def load(path):
+    """Every cycle in a spill file as a read-only numpy array over an mmap
+
+    The array keeps the mapping open for as long as it is referenced.  A
+    trailing partial record (spill mid-write) is ignored.
+    """
+    import numpy as np
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size < HEADER.size:
+            return np.zeros(0, dtype=record_dtype())
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    magic, version, size = HEADER.unpack_from(mm)
+    if magic != MAGIC or version != VERSION or size != RECORD.size:
+        mm.close()
+        raise ValueError(f"{path} is not a cycle history file")
+    count = (len(mm) - HEADER.size) // RECORD.size
+    return np.frombuffer(mm, dtype=record_dtype(), count=count, offset=HEADER.size)
+
+
+def aggregate(times, roads, served, priority, since=None, until=None):
+    """Totals over cycles with since <= time < until (time-sorted numpy columns)"""
+    import numpy as np
+    lo = 0 if since is None else np.searchsorted(times, since, side="left")
+    hi = len(times) if until is None else np.searchsorted(times, until, side="left")
+    roads, served, priority = roads[lo:hi], served[lo:hi], priority[lo:hi]
+    per_road = np.bincount(roads, weights=served, minlength=len(ROADS))
+    cycles = int(hi - lo)
+    total = int(served.sum())
+    return {
+        "cycles": cycles,
+        "served": total,
+        "mean_served": total / cycles if cycles else 0.0,
+        "priority_cycles": int(priority.sum()),
+        "served_per_road": {road: int(n) for road, n in zip(ROADS, per_road)},
+    }
+
+# ================= RING BUFFER =================
+class CycleHistory:
+    """The last `capacity` light cycles in fixed-size columns
+
+    Each column is an array.array written in place, so memory stays constant
+    however long the simulator runs.  Once full, the oldest cycle is
+    overwritten; if spill_path is set it is first appended to that file
+    (batched, SPILL_BATCH records per write).  Cycles must be recorded in
+    time order.
+    """
+    def __init__(self, capacity=CAPACITY, spill_path=None):
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self.capacity = capacity
+        self.times = array("d", bytes(8 * capacity))
+        self.served = array("I", bytes(4 * capacity))
+        self.roads = array("B", bytes(capacity))
+        self.priority = array("B", bytes(capacity))
+        self.next = 0      # slot the next cycle goes into
+        self.count = 0
+        self.total = 0     # cycles ever recorded, including spilled ones
+
+        self.fd = None
+        self.spilled = bytearray()
+        if spill_path is not None:
+            self.fd = os.open(spill_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+            os.write(self.fd, HEADER.pack(MAGIC, VERSION, RECORD.size))
+
+    def append(self, time, road, served, priority):
+        slot = self.next
+        if self.count == self.capacity:
+            if self.fd is not None:
+                self.spilled += RECORD.pack(self.times[slot], self.served[slot],
+                                            self.roads[slot], self.priority[slot])
+                if len(self.spilled) >= SPILL_BATCH * RECORD.size:
+                    self.flush()
+        else:
+            self.count += 1
+        self.times[slot] = time
+        self.roads[slot] = ROAD_CODES[road]
+        self.served[slot] = served
+        self.priority[slot] = 1 if priority else 0
+        self.next = (slot + 1) % self.capacity
+        self.total += 1
+
+    def __len__(self):
+        return self.count
+
+    def slot(self, index):
+        """Physical slot of logical index (0 = oldest in memory, -1 = newest)"""
+        if index < 0:
+            index += self.count
+        if not 0 <= index < self.count:
+            raise IndexError("cycle history index out of range")
+        return (self.next - self.count + index) % self.capacity
+
+    def entry(self, slot):
+        return {
+            "time": self.times[slot],
+            "road": ROADS[self.roads[slot]],
+            "served": self.served[slot],
+            "priority": bool(self.priority[slot]),
+        }
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self.entry(self.slot(i)) for i in range(*index.indices(self.count))]
+        return self.entry(self.slot(index))
+
+    def recent(self, n):
+        """The last n cycles, oldest first"""
+        return self[max(0, self.count - n):]
+
+    def columns(self):
+        """(times, roads, served, priority) oldest first as numpy arrays"""
+        import numpy as np
+        start = (self.next - self.count) % self.capacity
+        result = []
+        for column in (self.times, self.roads, self.served, self.priority):
+            view = np.frombuffer(column, dtype=column.typecode)
+            if self.count < self.capacity:
+                result.append(view[:self.count])
+            else:
+                result.append(np.concatenate([view[start:], view[:start]]))
+        return tuple(result)
+
+    def aggregate(self, since=None, until=None, last=None):
+        """Totals over the in-memory cycles in [since, until), or the last N"""
+        times, roads, served, priority = self.columns()
+        if last is not None:
+            keep = slice(max(0, len(times) - last), None)
+            times, roads, served, priority = times[keep], roads[keep], served[keep], priority[keep]
+        return aggregate(times, roads, served, priority, since, until)
+
+    def flush(self):
+        data, self.spilled = self.spilled, bytearray()
+        view = memoryview(data)
+        while view:
+            view = view[os.write(self.fd, view):]
+
+    def close(self):
+        if self.fd is not None:
+            self.flush()
+            os.close(self.fd)
+            self.fd = None
@@ -0,0 +1,205 @@
+import argparse
+import heapq
+import itertools
+import math
+import random
+
+from clock import VirtualClock
+from simulator import Simulator, ROAD_FOR_DIRECTION
+
+# Event kinds; at equal times they are handled in this order
+ARRIVAL = 0
+DEPARTURE = 1
+PHASE_END = 2
+PRIORITY_START = 3
+PHASE_START = 4
+
+# The Simulator settings this policy reads (the rest of DEFAULT_CONFIG is ignored)
+CONFIG_KEYS = ("time_per_vehicle", "green_time", "cycle_pause",
+               "priority_activation_threshold", "stats_print_interval")
+
+
+class EventSimulator(Simulator):
+    """Simulator driven by a binary heap of timed events
+
+    Same round-robin + AL2 priority policy as Simulator.step, but the clock
+    jumps straight to the next event, and runs of cycles that would serve
+    nobody are skipped in one go.  Run cost grows with the number of events, not
+    with simulated time.  Skipped idle cycles still rotate the lights and
+    count towards cycle_count, but are not written to cycle_history.
+    """
+    def __init__(self, arrivals, clock=None, log_file=None, history_file=None, verbose=False,
+                 config=None, cycle_file=None):
+        super().__init__(clock if clock is not None else VirtualClock(), input_file=None,
+                         log_file=log_file, history_file=history_file, verbose=verbose,
+                         config=config, cycle_file=cycle_file)
+        if self.controller is not None:
+            raise ValueError("EventSimulator runs the built-in rotation only; "
+                             "use Simulator for controller strategies")
+        self.arrivals = arrivals
+        self.events = []
+        self.sequence = itertools.count()
+        self.events_processed = 0
+        self.next_arrival_at = None
+
+        self.handlers = {
+            ARRIVAL: self.on_arrival,
+            DEPARTURE: self.on_departure,
+            PHASE_END: self.on_phase_end,
+            PRIORITY_START: self.on_priority_start,
+            PHASE_START: self.on_phase_start,
+        }
+
+    def schedule(self, when, kind, data=None):
+        """Push an event at absolute clock time `when`"""
+        heapq.heappush(self.events, (when, kind, next(self.sequence), data))
+
+    def schedule_next_arrival(self):
+        arrival = self.arrivals.next_arrival()
+        if arrival is None:
+            # A replayed trace ran out
+            self.next_arrival_at = math.inf
+            return
+        when_ms, direction, _ = arrival
+        self.next_arrival_at = self.started + when_ms / 1000
+        self.schedule(self.next_arrival_at, ARRIVAL, ROAD_FOR_DIRECTION[direction])
+
+    def run(self, until=None, max_events=None):
+        """Process events until `until` simulated seconds (or max_events)"""
+        if not self.events:
+            self.schedule_next_arrival()
+            self.schedule(self.clock.now(), PHASE_START)
+
+        while self.events:
+            if max_events is not None and self.events_processed >= max_events:
+                break
+            when, kind, _, data = self.events[0]
+            if until is not None and when - self.started > until:
+                break
+            heapq.heappop(self.events)
+            self.clock.advance_to(when)
+            self.handlers[kind](data)
+            self.events_processed += 1
+
+        return self.summary()
+
+    # ----- handlers -----
+    def on_arrival(self, road):
+        self.add_vehicle(road, self.clock.now())
+        self.schedule_next_arrival()
+
+    def on_departure(self, vehicle):
+        road, arrived_at = vehicle
+        self.record_departure(road, arrived_at, self.clock.now())
+
+    def idle_cycles(self):
+        """How many upcoming cycles would serve nobody
+
+        A cycle is idle when its road is empty and no vehicle arrives before
+        it starts (AL2 only changes on arrivals, so it cannot interrupt).
+        """
+        if self.next_arrival_at == math.inf:
+            before_arrival = len(self.light_queue)
+        else:
+            pause = self.config["cycle_pause"]
+            before_arrival = max(1, math.ceil((self.next_arrival_at - self.clock.now()) / pause))
+        for i, road in enumerate(self.light_queue):
+            if i >= before_arrival:
+                break
+            if not self.road_map[road].is_empty():
+                return i
+        return before_arrival
+
+    def on_phase_start(self, _):
+        if self.AL2.size() > self.config["priority_activation_threshold"]:
+            self.schedule(self.clock.now(), PRIORITY_START)
+            return
+
+        idle = self.idle_cycles()
+        if idle == len(self.light_queue) and self.next_arrival_at == math.inf:
+            # Nothing queued and nothing left to arrive: the run is over
+            return
+        if idle:
+            # Each idle cycle just advances the rotation after a cycle_pause
+            self.light_queue.rotate(idle)
+            self.cycle_count += idle
+            self.schedule(self.clock.now() + idle * self.config["cycle_pause"], PHASE_START)
+            return
+
+        road = self.get_next_road()
+        self.log_event(f"Green light for Road {road}")
+        self.start_green(self.road_map[road], road, False)
+
+    def on_priority_start(self, _):
+        self.priority_activations += 1
+        self.log_event("Priority lane AL2 activated")
+        self.start_green(self.AL2, "AL2", True)
+
+    def start_green(self, queue, road, priority):
+        """Release the vehicles waiting at the start of the green phase"""
+        time_per_vehicle = self.config["time_per_vehicle"]
+        slots = math.ceil(self.config["green_time"] / time_per_vehicle)
+        leaving = queue.dequeue_many(slots)
+        now = self.clock.now()
+        for i, arrived_at in enumerate(leaving):
+            self.schedule(now + (i + 1) * time_per_vehicle, DEPARTURE, (road, arrived_at))
+
+        self.total_served += len(leaving)
+        self.served_per_road[road] += len(leaving)
+        self.schedule(now + len(leaving) * time_per_vehicle, PHASE_END,
+                      (road, len(leaving), priority))
+
+    def on_phase_end(self, phase):
+        road, served, priority = phase
+        self.log_event(f"{'AL2' if priority else 'Road ' + road} served {served} vehicles")
+        self.record_cycle(road, served, priority)
+
+        if priority:
+            self.light_queue.enqueue("A")
+            self.schedule(self.clock.now(), PHASE_START)
+            return
+
+        self.cycle_count += 1
+        if self.cycle_count % self.config["stats_print_interval"] == 0:
+            self.report_stats()
+        self.schedule(self.clock.now() + self.config["cycle_pause"], PHASE_START)
+
+    def summary(self):
+        return {
+            "simulated_seconds": self.elapsed(),
+            "events": self.events_processed,
+            "cycles": self.cycle_count,
+            "served": self.total_served,
+            "served_per_road": dict(self.served_per_road),
+            "priority_activations": self.priority_activations,
+            "max_queue": max(self.stats.max_queue.values()),
+            "mean_wait": self.stats.all.running.mean,
+            "p95_wait": self.stats.all.quantiles["p95"].value(),
+        }
+
+
+def main():
+    from headless import RandomArrivals, SPAWN_MIN, SPAWN_MAX
+
+    parser = argparse.ArgumentParser(description="Event-driven queue simulator")
+    parser.add_argument("--hours", type=float, default=24, help="simulated hours")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--sparse", type=float, default=1,
+                        help="stretch the gap between arrivals by this factor (night traffic)")
+    args = parser.parse_args()
+
+    arrivals = RandomArrivals(random.Random(args.seed),
+                              SPAWN_MIN * args.sparse, SPAWN_MAX * args.sparse)
+    sim = EventSimulator(arrivals)
+    summary = sim.run(until=args.hours * 3600)
+
+    print("=" * 50)
+    print("EVENT SIMULATION FINISHED")
+    print("=" * 50)
+    for key, value in summary.items():
+        print(f"{key}: {value}")
+    print("=" * 50)
+
+
+if __name__ == "__main__":
+    main()
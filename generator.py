@@ -1,8 +1,14 @@
+import argparse
 import random
 import time
 import os
 
-# Map roads to directions 
+import records
+
+INPUT_FILE = "input.txt"
+BINARY_FILE = "vehicles.bin"
+
+# Map roads to directions
 roads_map = {
     "A": "up",
     "B": "down",
@@ -10,35 +16,147 @@ roads_map = {
     "D": "right"
 }
 
-# Ensure file is empty at start
-with open("input.txt", "w") as f:
-    f.write("")
 
-print("=" * 50)
-print("TRAFFIC GENERATOR STARTED")
-print("=" * 50)
-print("Generating vehicles and writing to input.txt...")
-print("Press Ctrl+C to stop")
-print("=" * 50)
+class VehicleWriter:
+    """Buffered appender for input.txt
+
+    Lines are collected in memory and written with a single O_APPEND write per
+    flush, so readers only ever see whole lines appended (TailReader also
+    ignores a trailing partial line).  A flush happens when batch_size lines
+    are buffered or flush_interval seconds have passed since the last one.
+    """
+    def __init__(self, path=INPUT_FILE, batch_size=1, flush_interval=0.05):
+        self.fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.buffer = []
+        self.last_flush = time.monotonic()
+
+    def encode(self, direction, lane_type):
+        return f"{direction},{lane_type}\n".encode()
+
+    def write(self, direction, lane_type):
+        self.buffer.append(self.encode(direction, lane_type))
+        if (len(self.buffer) >= self.batch_size or
+                time.monotonic() - self.last_flush >= self.flush_interval):
+            self.flush()
+
+    def flush(self):
+        if self.buffer:
+            data = b"".join(self.buffer)
+            self.buffer.clear()
+            while data:
+                written = os.write(self.fd, data)
+                data = data[written:]
+        self.last_flush = time.monotonic()
+
+    def close(self):
+        self.flush()
+        os.close(self.fd)
 
-try:
-    while True:
-        road_key = random.choice(list(roads_map.keys()))
+
+class BinaryVehicleWriter(VehicleWriter):
+    """Same buffering, but writes fixed-size records (see records.py)"""
+    def __init__(self, path=BINARY_FILE, batch_size=1, flush_interval=0.05):
+        super().__init__(path, batch_size, flush_interval)
+        records.write_header(self.fd)
+        self.next_id = records.record_count(self.fd)   # carry on after existing vehicles
+
+    def encode(self, direction, lane_type):
+        data = records.pack(time.time(), self.next_id,
+                            records.DIRECTION_CODES[direction], records.LANE_CODES[lane_type])
+        self.next_id += 1
+        return data
+
+
+def generate(writer, rate=None, quiet=False, count=None, rng=random):
+    """Write vehicles until count is reached (forever if None)
+
+    rate=None keeps the original 0.4-1.2 s random gap; otherwise arrivals are
+    Poisson at `rate` vehicles per second (0 = as fast as possible).
+    """
+    generated = 0
+    next_time = time.monotonic()
+    while count is None or generated < count:
+        road_key = rng.choice(list(roads_map.keys()))
         direction = roads_map[road_key]
-        
+
         # Randomly decide if it's a turning car (30% chance)
-        lane_type = "turn" if random.random() < 0.3 else "straight"
+        lane_type = "turn" if rng.random() < 0.3 else "straight"
+
+        writer.write(direction, lane_type)
+        generated += 1
 
-        
-        with open("input.txt", "a") as f:
-            f.write(f"{direction},{lane_type}\n")
+        if not quiet:
+            print(f"Generated: Road {road_key} → {direction.upper()} ({lane_type})")
+
+        if rate == 0:
+            continue
 
-        print(f"Generated: Road {road_key} → {direction.upper()} ({lane_type})")
-        
         # Randomize spawn time for realistic traffic (0.4 to 1.2 seconds)
-        time.sleep(random.uniform(0.4, 1.2))
-        
-except KeyboardInterrupt:
-    print("\n" + "=" * 50)
-    print("Generator stopped by user")
-    print("=" * 50)
\ No newline at end of file
+        if rate is None:
+            next_time += rng.uniform(0.4, 1.2)
+        else:
+            next_time += rng.expovariate(rate)
+
+        delay = next_time - time.monotonic()
+        if delay > 0:
+            # Never hold buffered vehicles back across a long sleep
+            if delay >= writer.flush_interval:
+                writer.flush()
+            time.sleep(delay)
+
+    return generated
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write random vehicles to input.txt")
+    parser.add_argument("--rate", type=float, default=None,
+                        help="vehicles per second (Poisson); 0 = unthrottled; "
+                             "default: one every 0.4-1.2 s")
+    parser.add_argument("--batch-size", type=int, default=1,
+                        help="flush after this many vehicles (default: every vehicle)")
+    parser.add_argument("--flush-interval", type=float, default=0.05,
+                        help="flush at least this often, in seconds")
+    parser.add_argument("--count", type=int, default=None, help="stop after N vehicles")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--quiet", action="store_true", help="do not print every vehicle")
+    parser.add_argument("--format", choices=["text", "binary"], default="text",
+                        help="text lines for the live consumers, or binary records")
+    parser.add_argument("--output", default=None,
+                        help=f"default: {INPUT_FILE} (text) or {BINARY_FILE} (binary)")
+    args = parser.parse_args()
+
+    binary = args.format == "binary"
+    output = args.output or (BINARY_FILE if binary else INPUT_FILE)
+
+    # Ensure file is empty at start
+    with open(output, "w") as f:
+        f.write("")
+
+    print("=" * 50)
+    print("TRAFFIC GENERATOR STARTED")
+    print("=" * 50)
+    print(f"Generating vehicles and writing to {output}...")
+    print("Press Ctrl+C to stop")
+    print("=" * 50)
+
+    writer_class = BinaryVehicleWriter if binary else VehicleWriter
+    writer = writer_class(output, args.batch_size, args.flush_interval)
+    started = time.monotonic()
+    generated = 0
+    try:
+        generated = generate(writer, args.rate, args.quiet, args.count, random.Random(args.seed))
+        print(f"Generated {generated} vehicles in {time.monotonic() - started:.2f} s")
+
+    except KeyboardInterrupt:
+        print("\n" + "=" * 50)
+        print("Generator stopped by user")
+        print("=" * 50)
+
+    finally:
+        writer.close()
+
+
+if __name__ == "__main__":
+    main()
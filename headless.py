@@ -0,0 +1,138 @@
+import argparse
+import json
+import random
+import time
+
+from traffic_manager import TrafficManager, TICK_MS
+
+# ================= DEMAND (same shape as generator.py) =================
+DIRECTIONS = ["up", "down", "left", "right"]
+TURN_CHANCE = 0.3
+SPAWN_MIN = 0.4   # seconds between vehicles
+SPAWN_MAX = 1.2
+
+
+class RandomArrivals:
+    """Seeded stand-in for generator.py, timed in virtual milliseconds"""
+    def __init__(self, rng, spawn_min=SPAWN_MIN, spawn_max=SPAWN_MAX):
+        self.rng = rng
+        self.spawn_min = spawn_min
+        self.spawn_max = spawn_max
+        self.next_time = 0
+
+    def next_arrival(self):
+        """Return (time_ms, direction, lane_type) and schedule the one after"""
+        when = self.next_time
+        direction = self.rng.choice(DIRECTIONS)
+        lane_type = "turn" if self.rng.random() < TURN_CHANCE else "straight"
+        self.next_time += self.rng.uniform(self.spawn_min, self.spawn_max) * 1000
+        return when, direction, lane_type
+
+    def due(self, now_ms):
+        """Yield (time_ms, direction, lane_type) for every arrival up to now_ms"""
+        while self.next_time <= now_ms:
+            yield self.next_arrival()
+
+# ================= RUNNER =================
+def make_manager(engine="object", rng=None, config=None):
+    """Build a TrafficManager that does not read input.txt"""
+    if engine == "vector":
+        from vector_engine import VectorTrafficManager
+        return VectorTrafficManager(input_file=None, rng=rng, config=config)
+    return TrafficManager(input_file=None, rng=rng, config=config)
+
+
+def run(ticks, seed=None, engine="object", speed=None, arrivals=None, on_tick=None,
+        profile=False, config=None):
+    """Step a TrafficManager for a number of fixed TICK_MS ticks
+
+    speed=None runs as fast as possible; speed=1 paces ticks to wall-clock
+    time, speed=10 runs ten times faster than real time, and so on.
+    profile=True adds the manager's get_metrics() to the summary; config
+    overrides TrafficManager settings (see traffic_manager.DEFAULT_CONFIG).
+    """
+    rng = random.Random(seed)
+    manager = make_manager(engine, rng, config)
+    if profile:
+        manager.enable_profiling()
+    if arrivals is None:
+        arrivals = RandomArrivals(rng)
+
+    max_queue = 0
+    started = time.perf_counter()
+    try:
+        for tick in range(ticks):
+            for _, direction, lane_type in arrivals.due(tick * TICK_MS):
+                manager.spawn_car(direction, lane_type)
+
+            manager.update()
+
+            queues = manager.get_state()["queues"]
+            max_queue = max(max_queue, max(queues.values()))
+            if on_tick is not None:
+                on_tick(manager, tick)
+
+            if speed:
+                # Sleep until this tick is due on the (scaled) wall clock
+                due = started + (tick + 1) * TICK_MS / 1000 / speed
+                delay = due - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+    finally:
+        manager.close()
+
+    wall = time.perf_counter() - started
+    on_screen = len(manager.get_state()["cars"])
+    stats = manager.get_stats()
+    virtual_seconds = ticks * TICK_MS / 1000
+    summary = {
+        "ticks": ticks,
+        "virtual_seconds": virtual_seconds,
+        "wall_seconds": wall,
+        "spawned": manager.car_id_counter,
+        "departed": manager.car_id_counter - on_screen,
+        "on_screen": on_screen,
+        "max_queue": max_queue,
+        "throughput_per_min": stats["throughput"]["per_minute"],
+        "mean_wait": stats["wait"]["mean"],
+        "p95_wait": stats["wait"]["p95"],
+        "lanes": stats["lanes"],
+    }
+    if profile:
+        summary["profile"] = manager.get_metrics()
+    return summary
+
+# ================= CLI =================
+def main():
+    parser = argparse.ArgumentParser(description="Run the traffic simulation without a display")
+    parser.add_argument("--ticks", type=int, default=120000,
+                        help=f"number of {TICK_MS} ms ticks (default: one hour)")
+    parser.add_argument("--seed", type=int, default=None, help="RNG seed for demand and colours")
+    parser.add_argument("--engine", choices=["object", "vector"], default="object")
+    parser.add_argument("--speed", type=float, default=None,
+                        help="pace to N x real time (default: as fast as possible)")
+    parser.add_argument("--profile", action="store_true",
+                        help="time each update() stage and print the metrics")
+    args = parser.parse_args()
+
+    summary = run(args.ticks, seed=args.seed, engine=args.engine, speed=args.speed,
+                  profile=args.profile)
+    profile = summary.pop("profile", None)
+    lanes = summary.pop("lanes")
+
+    print("=" * 50)
+    print("HEADLESS RUN FINISHED")
+    print("=" * 50)
+    for key, value in summary.items():
+        print(f"{key}: {value:.2f}" if isinstance(value, float) else f"{key}: {value}")
+    print("Queue wait per lane (s):")
+    for lane, wait in lanes.items():
+        print(f"  {lane:<6} n={wait['count']:<6} mean={wait['mean']:.2f} p50={wait['p50']:.2f} "
+              f"p95={wait['p95']:.2f} p99={wait['p99']:.2f} max={wait['max']:.2f}")
+    print("=" * 50)
+    if profile is not None:
+        print(json.dumps(profile, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,259 @@
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import time
+import zlib
+
+HEAD_BYTES = 256   # leading bytes remembered to spot a file rewritten in place
+
+# ================= INOTIFY (Linux only, optional) =================
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+EVENT_HEADER = struct.Struct("iIII")  # wd, mask, cookie, name length
+
+_libc = None
+_libc_name = ctypes.util.find_library("c") if sys.platform.startswith("linux") else None
+if _libc_name:
+    try:
+        _libc = ctypes.CDLL(_libc_name, use_errno=True)
+        _libc.inotify_init1
+    except (OSError, AttributeError):
+        _libc = None
+
+
+class DirectoryWatch:
+    """inotify watch on a file's directory (so rotation is seen too)"""
+    def __init__(self, path):
+        self.name = os.fsencode(os.path.basename(path))
+        self.fd = _libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        directory = os.fsencode(os.path.dirname(os.path.abspath(path)))
+        if _libc.inotify_add_watch(self.fd, directory, WATCH_MASK) < 0:
+            os.close(self.fd)
+            raise OSError(ctypes.get_errno(), "inotify_add_watch failed")
+
+    def changed(self):
+        """Drain pending events; True if any of them touched our file
+
+        A queue overflow (wd -1) means events were lost, so it counts as a
+        touch and the caller re-polls the file.
+        """
+        touched = False
+        while True:
+            try:
+                data = os.read(self.fd, 4096)
+            except BlockingIOError:
+                return touched
+            offset = 0
+            while offset < len(data):
+                wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+                offset += EVENT_HEADER.size
+                name = data[offset:offset + length].rstrip(b"\0")
+                offset += length
+                if name == self.name or (wd == -1 and mask & IN_Q_OVERFLOW):
+                    touched = True
+
+    def wait(self, timeout):
+        """Block until something happens in the directory (or timeout)"""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        return bool(ready)
+
+    def close(self):
+        os.close(self.fd)
+
+
+class StatWatch:
+    """Fallback when inotify is unavailable: compare os.stat results"""
+    def __init__(self, path, interval=0.05):
+        self.path = path
+        self.interval = interval
+        self.last = None
+
+    def changed(self):
+        try:
+            st = os.stat(self.path)
+            current = (st.st_ino, st.st_size, st.st_mtime_ns)
+        except FileNotFoundError:
+            current = None
+        touched = current != self.last
+        self.last = current
+        return touched
+
+    def wait(self, timeout):
+        time.sleep(self.interval if timeout is None else min(timeout, self.interval))
+        return True
+
+    def close(self):
+        pass
+
+# ================= TAIL READER =================
+class TailReader:
+    """Incremental reader for a line-based file that other processes append to
+
+    - Only complete lines are returned; a half-written last line is left for
+      the next call.
+    - The byte offset (and inode) can be checkpointed to offset_file so a
+      restart resumes exactly where the previous run stopped.
+    - Truncation restarts from the top: when size < offset, or when the
+      first bytes already read changed (truncated and rewritten past the old
+      offset between two polls).  Rotation (a new file under the same name)
+      finishes the old file first, then switches.
+    - read_lines() is a no-op unless the file changed (inotify on Linux,
+      os.stat polling elsewhere).
+    """
+    def __init__(self, path, offset_file=None, start_at_end=False):
+        self.path = path
+        self.offset_file = offset_file
+        self.handle = None
+        self.inode = None
+        self.offset = 0
+        self.pending = b""
+        self.head = b""    # first HEAD_BYTES read from this file
+
+        if not os.path.exists(path):
+            with open(path, "a"):
+                pass
+
+        try:
+            self.watch = DirectoryWatch(path) if _libc is not None else StatWatch(path)
+        except OSError:
+            self.watch = StatWatch(path)
+
+        self.open_file()
+        saved = self.load_checkpoint()
+        if (saved is not None and saved[0] == self.inode and saved[1] <= self.size()
+                and self.head_matches(saved[2], saved[3])):
+            self.offset = saved[1]
+        elif start_at_end:
+            self.offset = self.size()
+        self.handle.seek(self.offset)
+        self.remember_head()
+        self.dirty = True  # always look once at start
+
+    def open_file(self):
+        self.handle = open(self.path, "rb")
+        self.inode = os.fstat(self.handle.fileno()).st_ino
+        self.offset = 0
+        self.pending = b""
+        self.head = b""
+
+    def size(self):
+        return os.fstat(self.handle.fileno()).st_size
+
+    def read_head(self, count):
+        """First count bytes of the open file, leaving the read position alone"""
+        position = self.handle.tell()
+        self.handle.seek(0)
+        data = self.handle.read(count)
+        self.handle.seek(position)
+        return data
+
+    def remember_head(self):
+        if len(self.head) < HEAD_BYTES:
+            self.head = self.read_head(min(HEAD_BYTES, self.offset))
+
+    def head_matches(self, length, checksum):
+        """True if the file still starts with what a checkpoint saw (None = unknown)"""
+        return length is None or zlib.crc32(self.read_head(length)) == checksum
+
+    def rewritten(self):
+        """True if the bytes already read at the start of the file changed"""
+        return self.size() < self.offset or self.read_head(len(self.head)) != self.head
+
+    def load_checkpoint(self):
+        if self.offset_file is None:
+            return None
+        try:
+            with open(self.offset_file) as f:
+                fields = [int(field) for field in f.read().split()]
+        except (FileNotFoundError, ValueError):
+            return None
+        if len(fields) == 2:
+            return fields[0], fields[1], None, None   # written before head checksums
+        if len(fields) != 4:
+            return None
+        return tuple(fields)
+
+    def save_checkpoint(self):
+        if self.offset_file is None:
+            return
+        # Offset of the first byte not yet returned as a line
+        committed = self.offset - len(self.pending)
+        tmp = self.offset_file + ".tmp"
+        with open(tmp, "w") as f:
+            f.write(f"{self.inode} {committed} {len(self.head)} {zlib.crc32(self.head)}\n")
+        os.replace(tmp, self.offset_file)
+
+    def rotated(self):
+        """True if the path now names a different file than the open one"""
+        try:
+            return os.stat(self.path).st_ino != self.inode
+        except FileNotFoundError:
+            return False
+
+    def read_chunk(self):
+        data = self.handle.read()
+        self.offset += len(data)
+        return data
+
+    def read_lines(self):
+        """Return the complete lines appended since the last call"""
+        if self.watch.changed():
+            self.dirty = True
+        if not self.dirty:
+            return []
+        self.dirty = False
+
+        if self.rewritten():
+            # Truncated in place (and maybe written again): start over
+            self.handle.seek(0)
+            self.offset = 0
+            self.pending = b""
+            self.head = b""
+
+        data = self.pending + self.read_chunk()
+        if self.rotated():
+            # Finish what was written to the old file, then follow the new one
+            tail = data
+            self.handle.close()
+            self.open_file()
+            data = tail + (b"" if tail.endswith(b"\n") or not tail else b"\n") + self.read_chunk()
+        self.remember_head()
+
+        end = data.rfind(b"\n") + 1
+        self.pending = data[end:]
+        if self.pending:
+            self.dirty = True  # rest of the line may land without a new event
+        if not end:
+            return []
+
+        lines = data[:end].decode("utf-8", errors="replace").splitlines()
+        self.save_checkpoint()
+        return lines
+
+    def wait(self, timeout=None):
+        """Sleep until the file (probably) changed; returns False on timeout"""
+        if self.watch.changed():
+            self.dirty = True
+            return True
+        if self.watch.wait(timeout) and self.watch.changed():
+            self.dirty = True
+        return self.dirty
+
+    def close(self):
+        self.save_checkpoint()
+        self.handle.close()
+        self.watch.close()
@@ -0,0 +1,160 @@
+from bisect import bisect_right, insort
+from collections import deque
+
+
+# ================= STREAMING AGGREGATORS =================
+class P2Quantile:
+    """Streaming quantile estimate in constant memory (Jain & Chlamtac's P²)
+
+    Keeps five markers whose heights track the minimum, q/2, q, (1+q)/2 and
+    maximum of everything seen so far.
+    """
+    def __init__(self, q):
+        self.q = q
+        self.count = 0
+        self.heights = []
+        self.positions = [1, 2, 3, 4, 5]
+        self.desired = [1, 1 + 2 * q, 1 + 4 * q, 3 + 2 * q, 5]
+        self.increments = [0, q / 2, q, (1 + q) / 2, 1]
+
+    def add(self, x):
+        self.count += 1
+        h = self.heights
+        if self.count <= 5:
+            insort(h, x)
+            return
+
+        if x < h[0]:
+            h[0] = x
+            k = 0
+        elif x >= h[4]:
+            h[4] = x
+            k = 3
+        else:
+            k = bisect_right(h, x) - 1
+
+        n = self.positions
+        for i in range(k + 1, 5):
+            n[i] += 1
+        for i in range(5):
+            self.desired[i] += self.increments[i]
+
+        # Nudge the three middle markers towards their desired positions
+        for i in (1, 2, 3):
+            d = self.desired[i] - n[i]
+            if (d >= 1 and n[i + 1] - n[i] > 1) or (d <= -1 and n[i - 1] - n[i] < -1):
+                d = 1 if d > 0 else -1
+                height = self.parabolic(i, d)
+                if not h[i - 1] < height < h[i + 1]:
+                    height = h[i] + d * (h[i + d] - h[i]) / (n[i + d] - n[i])
+                h[i] = height
+                n[i] += d
+
+    def parabolic(self, i, d):
+        h, n = self.heights, self.positions
+        return h[i] + d / (n[i + 1] - n[i - 1]) * (
+            (n[i] - n[i - 1] + d) * (h[i + 1] - h[i]) / (n[i + 1] - n[i]) +
+            (n[i + 1] - n[i] - d) * (h[i] - h[i - 1]) / (n[i] - n[i - 1])
+        )
+
+    def value(self):
+        if self.count == 0:
+            return 0.0
+        if self.count <= 5:
+            return self.heights[min(self.count - 1, int(self.q * self.count))]
+        return self.heights[2]
+
+
+class RunningStats:
+    """Count, mean, variance (Welford) and maximum of a stream"""
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.max = 0.0
+
+    def add(self, x):
+        self.count += 1
+        delta = x - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (x - self.mean)
+        if x > self.max:
+            self.max = x
+
+    def variance(self):
+        return self.m2 / (self.count - 1) if self.count > 1 else 0.0
+
+
+class WaitStats:
+    """Mean/p50/p95/p99/max of wait times without storing them"""
+    def __init__(self):
+        self.running = RunningStats()
+        self.quantiles = {name: P2Quantile(q) for name, q in
+                          (("p50", 0.50), ("p95", 0.95), ("p99", 0.99))}
+
+    def add(self, wait):
+        self.running.add(wait)
+        for quantile in self.quantiles.values():
+            quantile.add(wait)
+
+    def summary(self):
+        summary = {"count": self.running.count, "mean": self.running.mean}
+        for name, quantile in self.quantiles.items():
+            summary[name] = quantile.value()
+        summary["max"] = self.running.max
+        return summary
+
+
+class Throughput:
+    """Departures per minute of (virtual) time; keeps the last `window` minutes"""
+    def __init__(self, window=60):
+        self.total = 0
+        self.minutes = deque(maxlen=window)   # [minute, count]
+
+    def add(self, seconds):
+        minute = int(seconds // 60)
+        if not self.minutes or self.minutes[-1][0] != minute:
+            self.minutes.append([minute, 0])
+        self.minutes[-1][1] += 1
+        self.total += 1
+
+    def summary(self, now):
+        """Rates at time `now` (seconds since the start)"""
+        current = int(now // 60)
+        last_minute = 0
+        for minute, count in self.minutes:
+            if minute == current - 1:
+                last_minute = count
+        return {
+            "total": self.total,
+            "per_minute": self.total / (now / 60) if now > 0 else 0.0,
+            "last_minute": last_minute,
+            "peak_minute": max((count for _, count in self.minutes), default=0),
+        }
+
+# ================= PER-LANE TRAFFIC STATS =================
+class TrafficStats:
+    """Wait-time distribution per lane and overall, throughput and max queue"""
+    def __init__(self, lanes):
+        self.all = WaitStats()
+        self.lanes = {lane: WaitStats() for lane in lanes}
+        self.max_queue = dict.fromkeys(lanes, 0)
+        self.throughput = Throughput()
+
+    def record_wait(self, lane, wait, now):
+        """A vehicle that waited `wait` seconds left at `now` (seconds since start)"""
+        self.all.add(wait)
+        self.lanes[lane].add(wait)
+        self.throughput.add(now)
+
+    def observe_queue(self, lane, length):
+        if length > self.max_queue[lane]:
+            self.max_queue[lane] = length
+
+    def summary(self, now):
+        return {
+            "wait": self.all.summary(),
+            "lanes": {lane: stats.summary() for lane, stats in self.lanes.items()},
+            "throughput": self.throughput.summary(now),
+            "max_queue": dict(self.max_queue),
+        }
@@ -1,17 +1,94 @@
+import threading
+from collections import deque
+
+# Overflow policies for bounded queues
+REJECT = "reject"            # enqueue returns False and the item is dropped
+DROP_OLDEST = "drop_oldest"  # the front item is evicted to make room
+BLOCK = "block"              # enqueue waits until a dequeue frees a slot
+
+
 class Queue:
-    def __init__(self):
-        self.items = []
+    def __init__(self, capacity=None, overflow=REJECT):
+        if overflow not in (REJECT, DROP_OLDEST, BLOCK):
+            raise ValueError(f"unknown overflow policy: {overflow}")
+        self.capacity = capacity
+        self.overflow = overflow
+        self.items = deque(maxlen=capacity if overflow == DROP_OLDEST else None)
+        # Only blocking queues pay for a lock
+        self.not_full = threading.Condition() if overflow == BLOCK else None
+
+    def enqueue(self, item, timeout=None):
+        """Add item at the back; returns False if it was not stored"""
+        if self.capacity is None or self.overflow == DROP_OLDEST:
+            self.items.append(item)
+            return True
+
+        if self.overflow == REJECT:
+            if len(self.items) >= self.capacity:
+                return False
+            self.items.append(item)
+            return True
 
-    def enqueue(self, item):
-        self.items.append(item)
+        with self.not_full:
+            if not self.not_full.wait_for(lambda: len(self.items) < self.capacity, timeout):
+                return False
+            self.items.append(item)
+            return True
+
+    def enqueue_many(self, items):
+        """Add several items; returns how many were stored"""
+        if self.capacity is None or self.overflow == DROP_OLDEST:
+            items = list(items)
+            self.items.extend(items)
+            return len(items)
+
+        stored = 0
+        for item in items:
+            if not self.enqueue(item):
+                break
+            stored += 1
+        return stored
 
     def dequeue(self):
-        if not self.is_empty():
-            return self.items.pop(0)
+        if self.not_full is None:
+            if not self.is_empty():
+                return self.items.popleft()
+            return None
+
+        with self.not_full:
+            if not self.is_empty():
+                self.not_full.notify()
+                return self.items.popleft()
+
+    def dequeue_many(self, count=None):
+        """Remove up to count items (all if None) from the front"""
+        if self.not_full is None:
+            return self._take(count)
+
+        with self.not_full:
+            taken = self._take(count)
+            self.not_full.notify_all()
+            return taken
+
+    def _take(self, count):
+        if count is None or count >= len(self.items):
+            taken = list(self.items)
+            self.items.clear()
+            return taken
+        popleft = self.items.popleft
+        return [popleft() for _ in range(count)]
+
+    def rotate(self, steps=1):
+        """Move the front item to the back, steps times"""
+        if self.items:
+            self.items.rotate(-(steps % len(self.items)))
 
     def is_empty(self):
         return len(self.items) == 0
 
+    def is_full(self):
+        return self.capacity is not None and len(self.items) >= self.capacity
+
     def size(self):
         return len(self.items)
 
@@ -20,4 +97,10 @@ class Queue:
             return self.items[0]
 
     def display(self):
-        print(self.items)
+        print(list(self.items))
+
+    def __len__(self):
+        return len(self.items)
+
+    def __iter__(self):
+        return iter(self.items)
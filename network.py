@@ -0,0 +1,282 @@
+import argparse
+import multiprocessing
+import os
+import random
+import time
+from collections import defaultdict
+
+from headless import make_manager, TURN_CHANCE
+from traffic_manager import TICK_MS
+
+# Grid offset of the neighbour a car reaches when it leaves in each direction
+NEIGHBOR = {"up": (-1, 0), "down": (1, 0), "left": (0, -1), "right": (0, 1)}
+
+# Approaches fed from outside the network on each edge of the grid
+EDGE_ENTRIES = {"top": "down", "bottom": "up", "left": "right", "right": "left"}
+
+SEGMENT_TICKS = 10   # travel time on the road between two intersections
+EDGE_RATE = 0.15     # vehicles per second entering on each outer approach
+
+
+# ================= SHARD =================
+class Shard:
+    """A band of grid rows, each cell its own TrafficManager
+
+    Cars leaving a cell are handed to the neighbouring cell after
+    SEGMENT_TICKS; when that cell belongs to another shard the transfer goes
+    to the outbox for the coordinator to route.  Every cell has its own seeded
+    RNG and arrivals are applied in a fixed order, so results do not depend
+    on how the grid is split into shards.
+
+    Each cell's controller sees the neighbours' waiting counts as of the end
+    of the previous tick (its `downstream`, used by max_pressure); the
+    counts of cells in other shards arrive through deliver().
+    """
+    def __init__(self, rows, cols, first_row, last_row, seed=0, engine="object",
+                 config=None, segment_ticks=SEGMENT_TICKS, edge_rate=EDGE_RATE):
+        self.rows = rows
+        self.cols = cols
+        self.first_row = first_row
+        self.last_row = last_row
+        self.segment_ticks = segment_ticks
+        self.entry_chance = edge_rate * TICK_MS / 1000
+        self.tick = 0
+
+        self.cells = {}
+        self.rngs = {}
+        self.entries = {}
+        self.queued = {}   # cell -> waiting per direction at the end of the last tick
+        for r in range(first_row, last_row):
+            for c in range(cols):
+                rng = random.Random(f"{seed}:{r}:{c}")
+                manager = make_manager(engine, rng, {**(config or {}), "verbose": False,
+                                                     "downstream": self.downstream_of((r, c))})
+                manager.on_exit = self.exit_handler((r, c))
+                self.cells[(r, c)] = manager
+                self.rngs[(r, c)] = rng
+                self.entries[(r, c)] = self.edge_entries(r, c)
+
+        self.inbox = defaultdict(list)   # tick -> [(target, source, direction)]
+        self.outbox = []                 # (tick, target, source, direction) for other shards
+        self.entered = 0
+        self.transferred = 0
+        self.left_network = 0
+
+    def edge_entries(self, r, c):
+        """Directions in which outside traffic enters this cell"""
+        entries = []
+        if r == 0:
+            entries.append(EDGE_ENTRIES["top"])
+        if r == self.rows - 1:
+            entries.append(EDGE_ENTRIES["bottom"])
+        if c == 0:
+            entries.append(EDGE_ENTRIES["left"])
+        if c == self.cols - 1:
+            entries.append(EDGE_ENTRIES["right"])
+        return entries
+
+    def exit_handler(self, cell):
+        def on_exit(direction):
+            dr, dc = NEIGHBOR[direction]
+            target = (cell[0] + dr, cell[1] + dc)
+            if not (0 <= target[0] < self.rows and 0 <= target[1] < self.cols):
+                self.left_network += 1
+                return
+            self.transferred += 1
+            message = (self.tick + self.segment_ticks, target, cell, direction)
+            if target in self.cells:
+                self.inbox[message[0]].append(message[1:])
+            else:
+                self.outbox.append(message)
+        return on_exit
+
+    def downstream_of(self, cell):
+        """Vehicles waiting at the intersection a phase of `cell` drives into"""
+        def downstream(phase):
+            dr, dc = NEIGHBOR[phase]
+            queued = self.queued.get((cell[0] + dr, cell[1] + dc))
+            return queued[phase] if queued else 0
+        return downstream
+
+    def edge_waiting(self):
+        """Waiting counts of this band's first and last rows, for the neighbouring shards"""
+        return {cell: dict(manager.waiting) for cell, manager in self.cells.items()
+                if cell[0] in (self.first_row, self.last_row - 1)}
+
+    def deliver(self, messages, waiting=None):
+        """Accept transfers and edge waiting counts routed from other shards"""
+        for due, target, source, direction in messages:
+            self.inbox[due].append((target, source, direction))
+        if waiting:
+            self.queued.update(waiting)
+
+    def step(self):
+        """Advance every cell one tick; returns transfers bound for other shards"""
+        for cell, manager in self.cells.items():
+            self.queued[cell] = dict(manager.waiting)
+
+        # Stable sort keeps each source's exit order
+        for target, _, direction in sorted(self.inbox.pop(self.tick, []), key=lambda m: m[:2]):
+            self.spawn(target, direction)
+
+        for cell, directions in self.entries.items():
+            for direction in directions:
+                if self.rngs[cell].random() < self.entry_chance:
+                    self.spawn(cell, direction)
+                    self.entered += 1
+
+        for manager in self.cells.values():
+            manager.update()
+        self.tick += 1
+
+        outgoing, self.outbox = self.outbox, []
+        return outgoing
+
+    def spawn(self, cell, direction):
+        lane_type = "turn" if self.rngs[cell].random() < TURN_CHANCE else "straight"
+        self.cells[cell].spawn_car(direction, lane_type)
+
+    def summary(self):
+        return {
+            "entered": self.entered,
+            "transferred": self.transferred,
+            "left_network": self.left_network,
+            "on_screen": sum(len(m.get_state()["cars"]) for m in self.cells.values()),
+            "in_transit": sum(len(messages) for messages in self.inbox.values()),
+        }
+
+    def close(self):
+        for manager in self.cells.values():
+            manager.close()
+
+# ================= PARALLEL DRIVER =================
+def shard_worker(conn, args):
+    """Process loop: receive transfers, step, send this shard's outgoing transfers
+
+    Each message is (transfers, waiting, finished); the shard answers with
+    (its outgoing transfers, its edge waiting counts), or on finished sends
+    its summary instead of stepping.
+    """
+    shard = Shard(*args)
+    try:
+        while True:
+            messages, waiting, finished = conn.recv()
+            shard.deliver(messages, waiting)
+            if finished:
+                break
+            conn.send((shard.step(), shard.edge_waiting()))
+        conn.send(shard.summary())
+    finally:
+        shard.close()
+        conn.close()
+
+
+def row_bands(rows, shards):
+    """Split rows into `shards` contiguous bands of (nearly) equal size"""
+    shards = max(1, min(shards, rows))
+    bounds = [rows * i // shards for i in range(shards + 1)]
+    return list(zip(bounds, bounds[1:]))
+
+
+def run(rows, cols, ticks, workers=None, seed=0, engine="object", config=None,
+        segment_ticks=SEGMENT_TICKS, edge_rate=EDGE_RATE):
+    """Simulate a rows x cols grid for `ticks` ticks on `workers` processes
+
+    workers=1 runs everything in this process.  Shards exchange transfers
+    after every tick.
+    """
+    if segment_ticks < 1:
+        raise ValueError("segment_ticks must be at least 1 (transfers land on a later tick)")
+    bands = row_bands(rows, workers or os.cpu_count())
+    shard_of_row = {}
+    for index, (first, last) in enumerate(bands):
+        for r in range(first, last):
+            shard_of_row[r] = index
+    shard_args = [(rows, cols, first, last, seed, engine, config, segment_ticks, edge_rate)
+                  for first, last in bands]
+
+    started = time.perf_counter()
+    if len(bands) == 1:
+        shard = Shard(*shard_args[0])
+        try:
+            for _ in range(ticks):
+                shard.step()
+            summaries = [shard.summary()]
+        finally:
+            shard.close()
+    else:
+        pipes = []
+        processes = []
+        for args in shard_args:
+            parent, child = multiprocessing.Pipe()
+            process = multiprocessing.Process(target=shard_worker, args=(child, args), daemon=True)
+            process.start()
+            pipes.append(parent)
+            processes.append(process)
+
+        routed = [[] for _ in bands]
+        edges = [{} for _ in bands]
+        for _ in range(ticks):
+            for conn, messages, waiting in zip(pipes, routed, edges):
+                conn.send((messages, waiting, False))
+            routed = [[] for _ in bands]
+            edges = [{} for _ in bands]
+            for index, conn in enumerate(pipes):
+                outgoing, waiting = conn.recv()
+                for message in outgoing:
+                    routed[shard_of_row[message[1][0]]].append(message)
+                # Bands above and below read this band's edge rows as downstream
+                for neighbour in (index - 1, index + 1):
+                    if 0 <= neighbour < len(bands):
+                        edges[neighbour].update(waiting)
+
+        # Transfers still on the way are handed over, then each shard reports
+        for conn, messages in zip(pipes, routed):
+            conn.send((messages, None, True))
+        summaries = [conn.recv() for conn in pipes]
+        for process in processes:
+            process.join()
+
+    wall = time.perf_counter() - started
+    total = {key: sum(s[key] for s in summaries) for key in summaries[0]}
+    virtual = ticks * TICK_MS / 1000
+    return {
+        "cells": rows * cols,
+        "shards": len(bands),
+        "ticks": ticks,
+        "virtual_seconds": virtual,
+        "wall_seconds": wall,
+        "realtime_factor": virtual / wall if wall else 0.0,
+        **total,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Grid of linked intersections")
+    parser.add_argument("--rows", type=int, default=20)
+    parser.add_argument("--cols", type=int, default=20)
+    parser.add_argument("--ticks", type=int, default=2000)
+    parser.add_argument("--workers", type=int, default=None, help="default: all cores")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--engine", choices=["object", "vector"], default="object")
+    parser.add_argument("--controller", default="round_robin",
+                        help="signal strategy from controllers.py for every cell")
+    parser.add_argument("--segment-ticks", type=int, default=SEGMENT_TICKS,
+                        help="ticks a car spends between two intersections")
+    parser.add_argument("--edge-rate", type=float, default=EDGE_RATE,
+                        help="vehicles per second entering on each outer approach")
+    args = parser.parse_args()
+
+    summary = run(args.rows, args.cols, args.ticks, args.workers, args.seed, args.engine,
+                  config={"controller": args.controller}, segment_ticks=args.segment_ticks, edge_rate=args.edge_rate)
+
+    print("=" * 50)
+    print("NETWORK RUN FINISHED")
+    print("=" * 50)
+    for key, value in summary.items():
+        print(f"{key}: {value:.2f}" if isinstance(value, float) else f"{key}: {value}")
+    print("=" * 50)
+
+
+if __name__ == "__main__":
+    main()
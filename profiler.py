@@ -0,0 +1,144 @@
+import json
+import time
+from bisect import bisect_left
+from collections import deque
+
+# Stages of TrafficManager.update, in call order
+STAGES = ["read_generator", "update_traffic_lights", "move", "cull"]
+
+# Histogram bucket upper bounds in milliseconds (one extra bucket for anything slower)
+BUCKETS_MS = [0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10, 20, 30, 50, 100]
+
+# Hot-path methods wrapped with a counter while profiling
+COUNTED = {
+    "find_car_ahead": "leader_lookups",
+    "add_to_queue": "queue_adds",
+    "remove_from_queue": "queue_removes",
+}
+
+
+class RollingHistogram:
+    """Bucket counts over the last `window` samples (O(1) per sample)"""
+    def __init__(self, bounds=BUCKETS_MS, window=1000):
+        self.bounds = bounds
+        self.window = window
+        self.counts = [0] * (len(bounds) + 1)
+        self.recent = deque()
+
+    def add(self, value):
+        bucket = bisect_left(self.bounds, value)
+        self.counts[bucket] += 1
+        self.recent.append(bucket)
+        if len(self.recent) > self.window:
+            self.counts[self.recent.popleft()] -= 1
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the q-quantile (None if past the last)"""
+        target = q * len(self.recent)
+        seen = 0
+        for bound, count in zip(self.bounds + [None], self.counts):
+            seen += count
+            if count and seen >= target:
+                return bound
+        return None
+
+    def as_dict(self):
+        labels = [f"<={bound}ms" for bound in self.bounds] + [f">{self.bounds[-1]}ms"]
+        return dict(zip(labels, self.counts))
+
+
+class FrameProfiler:
+    """Per-stage timing and call counters for TrafficManager.update
+
+    Only exists while profiling is enabled: the manager's update() takes its
+    normal path when it has no profiler, and the counters are instance-level
+    wrappers that detach() removes again.
+    """
+    def __init__(self, window=1000, dump_every=None, dump_path=None, budget_ms=30):
+        self.window = window
+        self.dump_every = dump_every
+        self.dump_path = dump_path
+        self.budget_ms = budget_ms
+
+        self.frames = 0
+        self.over_budget = 0
+        self.last = dict.fromkeys(STAGES + ["frame"], 0.0)
+        self.total = dict.fromkeys(STAGES + ["frame"], 0.0)
+        self.worst = dict.fromkeys(STAGES + ["frame"], 0.0)
+        self.histograms = {name: RollingHistogram(window=window) for name in STAGES + ["frame"]}
+        self.counters = dict.fromkeys(list(COUNTED.values()) + ["departures"], 0)
+
+    def attach(self, manager):
+        for method, counter in COUNTED.items():
+            manager.__dict__[method] = self.counting(getattr(manager, method), counter)
+
+    def detach(self, manager):
+        for method in COUNTED:
+            manager.__dict__.pop(method, None)
+
+    def counting(self, method, counter):
+        counters = self.counters
+
+        def wrapper(*args):
+            counters[counter] += 1
+            return method(*args)
+        return wrapper
+
+    def frame(self, manager):
+        """Run one instrumented update()"""
+        clock = time.perf_counter
+        t0 = clock()
+        manager.read_generator()
+        t1 = clock()
+        manager.update_traffic_lights()
+        t2 = clock()
+        departed = manager.move_cars()
+        t3 = clock()
+        self.counters["departures"] += manager.cull(departed)
+        t4 = clock()
+        self.record([t1 - t0, t2 - t1, t3 - t2, t4 - t3, t4 - t0])
+
+    def record(self, seconds):
+        self.frames += 1
+        for name, value in zip(STAGES + ["frame"], seconds):
+            ms = value * 1000
+            self.last[name] = ms
+            self.total[name] += ms
+            self.worst[name] = max(self.worst[name], ms)
+            self.histograms[name].add(ms)
+        if self.last["frame"] > self.budget_ms:
+            self.over_budget += 1
+
+        if self.dump_every and self.frames % self.dump_every == 0:
+            self.dump()
+
+    def metrics(self):
+        def stage(name):
+            histogram = self.histograms[name]
+            return {
+                "last_ms": self.last[name],
+                "mean_ms": self.total[name] / self.frames if self.frames else 0.0,
+                "max_ms": self.worst[name],
+                "p50_ms": histogram.quantile(0.5),
+                "p99_ms": histogram.quantile(0.99),
+            }
+
+        return {
+            "frames": self.frames,
+            "budget_ms": self.budget_ms,
+            "over_budget": self.over_budget,
+            "stages": {name: stage(name) for name in STAGES},
+            "frame": stage("frame"),
+            "histogram": self.histograms["frame"].as_dict(),
+            "counters": dict(self.counters),
+        }
+
+    def dump(self):
+        """Append the metrics as a JSON line, or print a one-line summary"""
+        if self.dump_path is not None:
+            with open(self.dump_path, "a") as f:
+                f.write(json.dumps(self.metrics()) + "\n")
+            return
+        stages = " ".join(f"{name}={self.last[name]:.2f}" for name in STAGES)
+        print(f"[profile] frame {self.frames}: {self.last['frame']:.2f} ms ({stages}) "
+              f"over budget {self.over_budget}")
@@ -0,0 +1,213 @@
+import argparse
+import mmap
+import os
+import struct
+
+# ================= FORMAT =================
+# File = 8-byte header + fixed-size little-endian records.
+#   header: magic, format version, record size
+#   record: time (float64 seconds), vehicle id (uint32),
+#           direction code, lane code, vehicle class (uint8 each), padding
+MAGIC = b"TVEV"
+VERSION = 1
+HEADER = struct.Struct("<4sHH")
+RECORD = struct.Struct("<dIBBBx")
+
+# Same order as vector_engine / the simulator's roads A-D
+DIRECTIONS = ["up", "down", "left", "right"]
+ROADS = ["A", "B", "C", "D"]
+LANE_TYPES = ["straight", "turn"]
+VEHICLE_CLASSES = ["car", "bus", "truck", "emergency"]
+
+DIRECTION_CODES = {name: code for code, name in enumerate(DIRECTIONS)}
+ROAD_CODES = {name: code for code, name in enumerate(ROADS)}
+LANE_CODES = {name: code for code, name in enumerate(LANE_TYPES)}
+CLASS_CODES = {name: code for code, name in enumerate(VEHICLE_CLASSES)}
+
+
+def record_dtype():
+    """numpy dtype matching RECORD (numpy is only needed for array access)"""
+    import numpy as np
+    return np.dtype([
+        ("time", "<f8"), ("id", "<u4"), ("direction", "u1"),
+        ("lane", "u1"), ("vehicle_class", "u1"), ("pad", "u1")
+    ])
+
+
+def pack(time, vehicle_id, direction, lane, vehicle_class=0):
+    """Encode one record from integer codes"""
+    return RECORD.pack(time, vehicle_id, direction, lane, vehicle_class)
+
+
+def write_header(fd):
+    """Start an empty record file"""
+    if os.fstat(fd).st_size == 0:
+        os.write(fd, HEADER.pack(MAGIC, VERSION, RECORD.size))
+
+
+def record_count(fd):
+    """Complete records already in an open file (the next vehicle id when appending)"""
+    return max(0, (os.fstat(fd).st_size - HEADER.size) // RECORD.size)
+
+
+def parse_text_line(line):
+    """Codes for one input.txt line, or None if it is not a vehicle
+
+    Accepts both spellings in use: "up,turn" (generator.py / TrafficManager)
+    and a bare road letter "A" (simulator.py, treated as straight).
+    """
+    parts = [part.strip() for part in line.split(",")]
+    if parts[0] in DIRECTION_CODES:
+        direction = DIRECTION_CODES[parts[0]]
+    elif parts[0] in ROAD_CODES:
+        direction = ROAD_CODES[parts[0]]
+    else:
+        return None
+    lane = LANE_CODES.get(parts[1], 0) if len(parts) > 1 else 0
+    return direction, lane
+
+# ================= WRITER =================
+class RecordWriter:
+    """Append records to a binary vehicle file, writing the header if new
+
+    Vehicle ids carry on from the records already in the file, unless
+    truncate=True empties it first.
+    """
+    def __init__(self, path, truncate=False):
+        flags = os.O_WRONLY | os.O_APPEND | os.O_CREAT
+        if truncate:
+            flags |= os.O_TRUNC
+        self.fd = os.open(path, flags, 0o644)
+        write_header(self.fd)
+        self.next_id = record_count(self.fd)
+
+    def encode(self, time, direction, lane, vehicle_class=0):
+        """Record bytes for one vehicle, numbering vehicles in write order"""
+        data = pack(time, self.next_id, direction, lane, vehicle_class)
+        self.next_id += 1
+        return data
+
+    def write_bytes(self, data):
+        while data:
+            written = os.write(self.fd, data)
+            data = data[written:]
+
+    def write(self, time, direction, lane, vehicle_class=0):
+        self.write_bytes(self.encode(time, direction, lane, vehicle_class))
+
+    def close(self):
+        os.close(self.fd)
+
+# ================= READER =================
+class RecordFile:
+    """Read-only mmap of a binary vehicle file
+
+    Iterating unpacks straight from the mapping; array() returns a numpy view
+    of the same pages.  A trailing partial record (writer mid-flush) is
+    ignored.  Drop any array() result before calling close().
+    """
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, record_size = HEADER.unpack_from(self.mm)
+        if magic != MAGIC:
+            self.mm.close()
+            raise ValueError(f"{path} is not a vehicle record file")
+        if version != VERSION or record_size != RECORD.size:
+            self.mm.close()
+            raise ValueError(f"{path}: unsupported version {version} (record size {record_size})")
+
+        self.count = (len(self.mm) - HEADER.size) // RECORD.size
+        self.view = memoryview(self.mm)[HEADER.size:HEADER.size + self.count * RECORD.size]
+
+    def __len__(self):
+        return self.count
+
+    def __iter__(self):
+        """Yield (time, id, direction, lane, vehicle_class) tuples"""
+        return RECORD.iter_unpack(self.view)
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += self.count
+        if not 0 <= index < self.count:
+            raise IndexError(index)
+        return RECORD.unpack_from(self.view, index * RECORD.size)
+
+    def array(self):
+        """Structured numpy array over the mapping (no copy)"""
+        import numpy as np
+        return np.frombuffer(self.mm, dtype=record_dtype(), count=self.count, offset=HEADER.size)
+
+    def close(self):
+        self.view.release()
+        self.mm.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+# ================= CONVERSION =================
+def convert_text(text_path, out_path, interval=0.0):
+    """Convert an input.txt-style file; vehicle i gets time i * interval
+
+    An existing out_path is replaced, not appended to.
+    """
+    writer = RecordWriter(out_path, truncate=True)
+    chunk = []
+    count = 0
+    try:
+        with open(text_path) as f:
+            for line in f:
+                codes = parse_text_line(line)
+                if codes is None:
+                    continue
+                chunk.append(writer.encode(count * interval, *codes))
+                count += 1
+                if len(chunk) >= 4096:
+                    writer.write_bytes(b"".join(chunk))
+                    chunk.clear()
+        writer.write_bytes(b"".join(chunk))
+    finally:
+        writer.close()
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Binary vehicle record tools")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    convert = commands.add_parser("convert", help="convert input.txt-style text to records")
+    convert.add_argument("source")
+    convert.add_argument("target")
+    convert.add_argument("--interval", type=float, default=0.0,
+                         help="seconds between consecutive vehicles")
+
+    info = commands.add_parser("info", help="summarise a record file")
+    info.add_argument("path")
+    args = parser.parse_args()
+
+    if args.command == "convert":
+        count = convert_text(args.source, args.target, args.interval)
+        print(f"Wrote {count} records to {args.target}")
+        return
+
+    with RecordFile(args.path) as records:
+        per_direction = [0] * len(DIRECTIONS)
+        turning = 0
+        for _, _, direction, lane, _ in records:
+            per_direction[direction] += 1
+            turning += lane
+        print(f"Records: {len(records)} (version {VERSION}, {RECORD.size} bytes each)")
+        if len(records):
+            print(f"Time span: {records[0][0]:.3f} - {records[-1][0]:.3f} s")
+        for name, count in zip(DIRECTIONS, per_direction):
+            print(f"  {name}: {count}")
+        print(f"  turning: {turning}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+import threading
+import time
+from collections import namedtuple
+
+from traffic_manager import CarView, TICK_MS
+
+# A packed manager.snapshot() and when (perf_counter) it was published
+Frame = namedtuple("Frame", ["published", "snapshot"])
+
+MAX_LAG_TICKS = 10   # beyond this the sim stops trying to catch up
+
+
+def interpolate(previous, current, alpha):
+    """Cars of Snapshot `current` moved back towards `previous` by (1 - alpha)
+
+    alpha=0 draws the previous tick's positions, alpha=1 the current ones.
+    Cars that just spawned are drawn where they are.
+    """
+    if previous is None or alpha >= 1:
+        return list(current.cars)
+    before = {car.id: car for car in previous.cars}
+    cars = []
+    for car in current.cars:
+        old = before.get(car.id)
+        if old is None:
+            cars.append(car)
+            continue
+        cars.append(CarView(car.id, old.x + (car.x - old.x) * alpha,
+                            old.y + (car.y - old.y) * alpha, car.w, car.h, car.color,
+                            car.lane_type, car.current_direction, car.turned,
+                            car.passed, car.in_queue))
+    return cars
+
+# ================= SIMULATION THREAD =================
+class SimulationThread:
+    """Steps a TrafficManager on its own thread at a fixed tick rate
+
+    Every tick is followed by publishing a (previous, current) pair of
+    Frames (packed manager.snapshot()s) with a single reference assignment,
+    so readers on other threads never lock and always see two consistent
+    frames.  speed=10 runs ten virtual ticks per TICK_MS of real time;
+    speed=0 runs flat out.  With stats_every=N, manager.get_stats() is also
+    published as .stats every N ticks for readers that want the metrics.
+    The manager must not be touched by other threads while this runs.
+    """
+    def __init__(self, manager, speed=1.0, arrivals=None, stats_every=None):
+        self.manager = manager
+        self.speed = speed
+        self.arrivals = arrivals
+        self.stats_every = stats_every
+        self.stats = manager.get_stats() if stats_every else None
+        self.frames = (None, Frame(time.perf_counter(), manager.snapshot()))
+        self.ticks = 0
+        self.stopping = threading.Event()
+        self.thread = threading.Thread(target=self.run, name="SimulationThread", daemon=True)
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.stopping.set()
+        if self.thread.is_alive():
+            self.thread.join()
+
+    def tick_seconds(self):
+        """Real seconds between ticks (0 when unthrottled)"""
+        return TICK_MS / 1000 / self.speed if self.speed else 0.0
+
+    def run(self):
+        interval = self.tick_seconds()
+        next_tick = time.perf_counter()
+        while not self.stopping.is_set():
+            if self.arrivals is not None:
+                for _, direction, lane_type in self.arrivals.due(self.manager.tick_count * TICK_MS):
+                    self.manager.spawn_car(direction, lane_type)
+            self.manager.update()
+            self.ticks += 1
+            now = time.perf_counter()
+            self.frames = (self.frames[1], Frame(now, self.manager.snapshot()))
+            if self.stats_every and self.ticks % self.stats_every == 0:
+                self.stats = self.manager.get_stats()
+
+            if interval:
+                next_tick += interval
+                if now - next_tick > MAX_LAG_TICKS * interval:
+                    next_tick = now   # too slow for this speed: drop the backlog
+                elif next_tick > now:
+                    self.stopping.wait(next_tick - now)
+
+    def sample(self, interpolated=True):
+        """Cars, lights and queues to draw right now (safe from any thread)"""
+        previous, current = self.frames
+        snapshot = current.snapshot
+        cars = snapshot.cars
+        if interpolated and previous is not None:
+            interval = current.published - previous.published
+            if interval > 0:
+                alpha = (time.perf_counter() - current.published) / interval
+                cars = interpolate(previous.snapshot, snapshot, min(alpha, 1.0))
+        return cars, snapshot.lights, snapshot.queues
@@ -1,188 +1,381 @@
+import argparse
+import math
+import random
 import time
+
+from asynclog import AsyncAppender
+from clock import WallClock, VirtualClock
+from controllers import make_controller
+from cycle_history import CycleHistory
+from ingest import TailReader
+from metrics import TrafficStats
 from myqueue import Queue
 
 
 LOG_FILE = "simulation.log"
 HISTORY_FILE = "history.txt"
+CYCLE_FILE = "cycles.bin"        # spill file for --cycle-file
+HISTORY_CAPACITY = 4096         # cycles kept in memory
+OFFSET_FILE = "simulator.offset"   # how far into input.txt we have read
 
 TIME_PER_VEHICLE = 1          # seconds per vehicle
 GREEN_TIME = 3               # green light duration per road
 STATS_PRINT_INTERVAL = 5     # cycles between stats print
+CYCLE_PAUSE = 1              # seconds between cycles
 
 PRIORITY_ACTIVATION_THRESHOLD = 10
 PRIORITY_RELEASE_THRESHOLD = 5
-
-light_queue = Queue()
-
-cycle_history = []
-
-
-total_served = 0
-served_per_road = {
-    "A": 0,
-    "B": 0,
-    "C": 0,
-    "D": 0,
-    "AL2": 0
-}
-priority_activations = 0
-cycle_count = 0
-
-# Incoming lanes
-AL1 = Queue()
-BL1 = Queue()
-CL1 = Queue()
-DL1 = Queue()
-
-# Priority lane
-AL2 = Queue()
-
-road_map = {
-    "A": AL1,
-    "B": BL1,
-    "C": CL1,
-    "D": DL1
+MAX_GREEN = 12               # longest green for the controller strategies
+
+# Per-instance settings: Simulator(config={...}) overrides any of these
+DEFAULT_CONFIG = {
+    "time_per_vehicle": TIME_PER_VEHICLE,
+    "green_time": GREEN_TIME,
+    "stats_print_interval": STATS_PRINT_INTERVAL,
+    "cycle_pause": CYCLE_PAUSE,
+    "priority_activation_threshold": PRIORITY_ACTIVATION_THRESHOLD,
+    "priority_release_threshold": PRIORITY_RELEASE_THRESHOLD,
+    # None keeps the built-in rotation below; otherwise a name in
+    # controllers.CONTROLLERS (or a Controller) picks every green
+    "controller": None,
+    "max_green": MAX_GREEN,
 }
 
-roads = ["A", "B", "C", "D"]
-current_road_index = 0
+ROADS = ["A", "B", "C", "D"]
 
-TIME_PER_VEHICLE = 1
-GREEN_TIME = 3
+# generator.py directions -> simulator roads
+ROAD_FOR_DIRECTION = {
+    "up": "A",
+    "down": "B",
+    "left": "C",
+    "right": "D"
+}
 
 
-def read_input():
-    try:
-        with open("input.txt", "r") as f:
-            lines = f.readlines()
-
-        open("input.txt", "w").close()
-
-        for road in lines:
-            road = road.strip()
-            if road == "A":
-                AL2.enqueue("V")
-            elif road in road_map:
-                road_map[road].enqueue("V")
-    except FileNotFoundError:
-        pass
-
-
-def serve(queue, seconds, road_name):
-    global total_served, served_per_road
-
-    served = 0
-    start = time.time()
-
-    while not queue.is_empty():
-        if time.time() - start >= seconds:
-            break
-        queue.dequeue()
-        served += 1
-        total_served += 1
-        served_per_road[road_name] += 1
-        time.sleep(TIME_PER_VEHICLE)
-
-    return served
-
-def log_event(message):
-    with open(LOG_FILE, "a") as log:
-        timestamp = time.strftime("%Y-%m-%d %H:%M:%S")
-        log.write(f"[{timestamp}] {message}\n")
-
-def record_cycle(road, served, priority_used):
-    entry = {
-        "time": time.strftime("%H:%M:%S"),
-        "road": road,
-        "served": served,
-        "priority": priority_used
-    }
-    cycle_history.append(entry)
-for road in roads:
-  light_queue.enqueue(road)
-
-def get_next_road():
-    road = light_queue.dequeue()
-    light_queue.enqueue(road)
-    return road
-
-def export_history():
-    with open(HISTORY_FILE, "w") as f:
-        f.write("Time,Road,Served,Priority\n")
-        for entry in cycle_history:
-            line = f"{entry['time']},{entry['road']},{entry['served']},{entry['priority']}\n"
-            f.write(line)
-
-try:
-    while True:
-        read_input()
-
-        print("\nQueue Status:")
-        print(
-            "AL1:", AL1.size(),
-            "BL1:", BL1.size(),
-            "CL1:", CL1.size(),
-            "DL1:", DL1.size(),
-            "| AL2 (Priority):", AL2.size()
+class Simulator:
+    def __init__(self, clock=None, input_file="input.txt", log_file=LOG_FILE,
+                 history_file=HISTORY_FILE, verbose=True, offset_file=OFFSET_FILE, config=None,
+                 cycle_file=None, history_capacity=HISTORY_CAPACITY):
+        config = config or {}
+        unknown = set(config) - set(DEFAULT_CONFIG)
+        if unknown:
+            raise ValueError(f"unknown config keys: {sorted(unknown)}")
+        self.config = {**DEFAULT_CONFIG, **config}
+        self.clock = clock if clock is not None else WallClock()
+        self.reader = None
+        if input_file is not None:
+            self.reader = TailReader(input_file, offset_file)
+        self.log_file = log_file
+        self.history_file = history_file
+        self.history_started = False
+        # Log and history lines are appended by a background thread
+        self.writer = None
+        if log_file is not None or history_file is not None:
+            self.writer = AsyncAppender()
+        self.verbose = verbose
+        self.started = self.clock.now()
+
+        self.light_queue = Queue()
+        for road in ROADS:
+            self.light_queue.enqueue(road)
+
+        self.controller = None
+        self.current_phase = None
+        self.phase_elapsed = 0
+        if self.config["controller"] is not None:
+            c = self.config
+            # AL2 is not in the rotation: it only gets green through the override
+            self.controller = make_controller(c["controller"], ROADS, {
+                "time_per_vehicle": c["time_per_vehicle"],
+                "min_green": c["green_time"],
+                "max_green": c["max_green"],
+                "startup_buffer": 0,
+                "gap": c["time_per_vehicle"],
+                "period": c["green_time"],
+                "priority_phase": "AL2",
+                "priority_threshold": c["priority_activation_threshold"],
+                "priority_release": c["priority_release_threshold"],
+                "priority_extra": 0,
+            })
+
+        # Recent cycles in memory; older ones spill to cycle_file if given
+        # (it is truncated, so only the CLI opts in)
+        self.cycle_history = CycleHistory(history_capacity, cycle_file)
+
+        self.total_served = 0
+        self.served_per_road = {
+            "A": 0,
+            "B": 0,
+            "C": 0,
+            "D": 0,
+            "AL2": 0
+        }
+        self.priority_activations = 0
+        self.cycle_count = 0
+        # Wait (arrival -> leaving the stop line) per road, throughput, max queue
+        self.stats = TrafficStats(ROADS + ["AL2"])
+
+        # Incoming lanes
+        self.AL1 = Queue()
+        self.BL1 = Queue()
+        self.CL1 = Queue()
+        self.DL1 = Queue()
+
+        # Priority lane
+        self.AL2 = Queue()
+
+        self.road_map = {
+            "A": self.AL1,
+            "B": self.BL1,
+            "C": self.CL1,
+            "D": self.DL1
+        }
+
+    def elapsed(self):
+        """Seconds of (possibly virtual) time since the simulator started"""
+        return self.clock.now() - self.started
+
+    def add_vehicle(self, road, arrived_at=None):
+        """Queue one vehicle on a road (A always feeds the priority lane)
+
+        Queues hold arrival times so waits can be measured when they leave.
+        """
+        if road == "A":
+            lane, queue = "AL2", self.AL2
+        elif road in self.road_map:
+            lane, queue = road, self.road_map[road]
+        else:
+            return
+        queue.enqueue(self.clock.now() if arrived_at is None else arrived_at)
+        self.stats.observe_queue(lane, queue.size())
+
+    def read_input(self):
+        if self.reader is None:
+            return
+        for road in self.reader.read_lines():
+            self.add_vehicle(road.strip())
+
+    def serve(self, queue, seconds, road_name):
+        # One vehicle leaves every time_per_vehicle while the light is green
+        time_per_vehicle = self.config["time_per_vehicle"]
+        slots = math.ceil(seconds / time_per_vehicle)
+        leaving = queue.dequeue_many(slots)
+        served = len(leaving)
+
+        # Vehicle i crosses the stop line (i + 1) slots into the green
+        now = self.clock.now()
+        for i, arrived_at in enumerate(leaving):
+            self.record_departure(road_name, arrived_at, now + (i + 1) * time_per_vehicle)
+
+        self.total_served += served
+        self.served_per_road[road_name] += served
+        self.clock.sleep(served * time_per_vehicle)
+
+        return served
+
+    def record_departure(self, road, arrived_at, left_at):
+        self.stats.record_wait(road, left_at - arrived_at, left_at - self.started)
+
+    def log_event(self, message):
+        if self.log_file is None:
+            return
+        timestamp = self.clock.strftime("%Y-%m-%d %H:%M:%S")
+        self.writer.write(self.log_file, f"[{timestamp}] {message}\n")
+
+    def record_cycle(self, road, served, priority_used):
+        self.cycle_history.append(self.clock.now(), road, served, priority_used)
+
+        # history.txt grows one line per cycle instead of being rewritten;
+        # unlike log lines, these wait for queue room rather than being dropped
+        if self.history_file is not None:
+            if not self.history_started:
+                self.writer.reset(self.history_file, "Time,Road,Served,Priority\n")
+                self.history_started = True
+            self.writer.write(self.history_file,
+                              f"{self.clock.strftime('%H:%M:%S')},{road},{served},{priority_used}\n",
+                              block=True)
+
+    def get_next_road(self):
+        road = self.light_queue.dequeue()
+        self.light_queue.enqueue(road)
+        return road
+
+    def export_history(self):
+        """Make sure history.txt (and the log) hold every cycle recorded so far"""
+        if self.writer is not None:
+            self.writer.flush()
+
+    def say(self, *args):
+        if self.verbose:
+            print(*args)
+
+    def step(self):
+        """Run one light cycle (a priority flush or the next road)"""
+        config = self.config
+        self.read_input()
+
+        self.say("\nQueue Status:")
+        self.say(
+            "AL1:", self.AL1.size(),
+            "BL1:", self.BL1.size(),
+            "CL1:", self.CL1.size(),
+            "DL1:", self.DL1.size(),
+            "| AL2 (Priority):", self.AL2.size()
         )
 
-        # Priority interrupt
-        if AL2.size() > PRIORITY_ACTIVATION_THRESHOLD:
-            priority_activations += 1
-            log_event("Priority lane AL2 activated")
-            print("Priority light GREEN for AL2")
-            served = serve(AL2, GREEN_TIME, "AL2")
-            log_event(f"AL2 served {served} vehicles")
-            record_cycle("AL2", served, True)
-            print("Vehicles passed from AL2:", served)
-            light_queue.enqueue("A")
-
-            continue
+        if self.controller is not None:
+            self.controlled_step()
+            return
 
+        # Priority interrupt
+        if self.AL2.size() > config["priority_activation_threshold"]:
+            self.priority_activations += 1
+            self.log_event("Priority lane AL2 activated")
+            self.say("Priority light GREEN for AL2")
+            served = self.serve(self.AL2, config["green_time"], "AL2")
+            self.log_event(f"AL2 served {served} vehicles")
+            self.record_cycle("AL2", served, True)
+            self.say("Vehicles passed from AL2:", served)
+            self.light_queue.enqueue("A")
+            return
 
         # Normal traffic light rotation
-        road = get_next_road()
-        queue = road_map[road]
-
-        print(f"GREEN light for Road {road}")
-        log_event(f"Green light for Road {road}")
-
-        served = serve(queue, GREEN_TIME, road)
-        log_event(f"Road {road} served {served} vehicles")
+        road = self.get_next_road()
+        queue = self.road_map[road]
+
+        self.say(f"GREEN light for Road {road}")
+        self.log_event(f"Green light for Road {road}")
+
+        served = self.serve(queue, config["green_time"], road)
+        self.log_event(f"Road {road} served {served} vehicles")
+
+        self.record_cycle(road, served, False)
+
+        self.say(f"Vehicles passed from Road {road}:", served)
+
+        self.cycle_count += 1
+
+        if self.cycle_count % config["stats_print_interval"] == 0:
+            self.report_stats()
+        self.clock.sleep(config["cycle_pause"])
+
+    def controlled_step(self):
+        """One green chosen by the configured controller"""
+        config = self.config
+        queues = {road: self.road_map[road].size() for road in ROADS}
+        queues["AL2"] = self.AL2.size()
+        road, seconds = self.controller.decide(queues, self.current_phase, self.phase_elapsed)
+        # Extending the green needs no all-red pause; only a switch does
+        switched = road != self.current_phase
+        if switched:
+            self.current_phase, self.phase_elapsed = road, seconds
+        else:
+            self.phase_elapsed += seconds
+        priority = road == "AL2"
+        if priority and switched:
+            # AL2 is outside the rotation, so switching to it is the override
+            self.priority_activations += 1
+            self.log_event("Priority lane AL2 activated")
+
+        self.say(f"GREEN light for {road} ({seconds} s, {self.controller.name})")
+        self.log_event(f"Green light for {road}")
+        served = self.serve(self.AL2 if priority else self.road_map[road], seconds, road)
+        self.log_event(f"{road} served {served} vehicles")
+        self.record_cycle(road, served, priority)
+        self.say(f"Vehicles passed from {road}:", served)
+
+        self.cycle_count += 1
+        if self.cycle_count % config["stats_print_interval"] == 0:
+            self.report_stats()
+        if switched:
+            self.clock.sleep(config["cycle_pause"])
+
+    def report_stats(self):
+        self.say("\n--- SIMULATION STATS ---")
+        self.say("Total vehicles served:", self.total_served)
+        self.say("Served per road:", self.served_per_road)
+        self.say("Priority activations:", self.priority_activations)
+        self.say("Recent cycles:")
+        for entry in self.cycle_history.recent(5):
+            self.say({**entry, "time": time.strftime("%H:%M:%S", time.localtime(entry["time"]))})
+
+        self.say("------------------------")
+
+    def run(self, cycles=None, arrivals=None):
+        """Run cycles (forever if None), optionally fed by a seeded arrival source"""
+        done = 0
+        while cycles is None or done < cycles:
+            if arrivals is not None:
+                for when, direction, _ in arrivals.due(self.elapsed() * 1000):
+                    self.add_vehicle(ROAD_FOR_DIRECTION[direction],
+                                     arrived_at=self.started + when / 1000)
+            self.step()
+            done += 1
+
+    def close(self):
+        if self.reader is not None:
+            self.reader.close()
+        if self.writer is not None:
+            self.writer.close()
+        self.cycle_history.close()
+
+    def print_final_stats(self):
+        print("Total vehicles served:", self.total_served)
+        print("Served per road:", self.served_per_road)
+        print("Priority activations:", self.priority_activations)
+        wait = self.stats.all.summary()
+        print(f"Wait (s): mean {wait['mean']:.1f}, p50 {wait['p50']:.1f}, "
+              f"p95 {wait['p95']:.1f}, p99 {wait['p99']:.1f}, max {wait['max']:.1f}")
+        print("Max queue per road:", self.stats.max_queue)
+        if self.writer is not None and self.writer.dropped:
+            print("Log lines dropped (writer queue full):", self.writer.dropped)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Queue-based traffic light simulator")
+    parser.add_argument("--virtual", action="store_true",
+                        help="run on a virtual clock with seeded random demand")
+    parser.add_argument("--cycles", type=int, default=None, help="stop after N cycles")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--quiet", action="store_true", help="only print the final stats")
+    parser.add_argument("--controller", default=None,
+                        help="signal strategy from controllers.py (default: built-in rotation)")
+    parser.add_argument("--cycle-file", nargs="?", const=CYCLE_FILE, default=None,
+                        help=f"keep cycles older than the in-memory history in this file "
+                             f"(default name {CYCLE_FILE}; overwritten)")
+    args = parser.parse_args()
+    config = {"controller": args.controller}
+
+    if args.virtual:
+        from headless import RandomArrivals
+        sim = Simulator(clock=VirtualClock(), input_file=None, verbose=not args.quiet,
+                        config=config, cycle_file=args.cycle_file)
+        arrivals = RandomArrivals(random.Random(args.seed))
+    else:
+        sim = Simulator(verbose=not args.quiet, config=config, cycle_file=args.cycle_file)
+        arrivals = None
 
-        record_cycle(road, served, False) 
-
-        print(f"Vehicles passed from Road {road}:", served)
-
-        current_road_index = (current_road_index + 1) % len(roads)
-        cycle_count += 1
-
-        if cycle_count % STATS_PRINT_INTERVAL == 0:
-            print("\n--- SIMULATION STATS ---")
-            print("Total vehicles served:", total_served)
-            print("Served per road:", served_per_road)
-            print("Priority activations:", priority_activations)
-            print("Recent cycles:")
-            for entry in cycle_history[-5:]:
-                print(entry)
-                export_history()
+    try:
+        sim.run(args.cycles, arrivals)
+        print("\nSimulation finished.")
+        print("Final Statistics:")
+        sim.print_final_stats()
+        sim.export_history()
+        sim.log_event(f"Simulation finished after {sim.elapsed():.0f} s")
 
-            print("------------------------")
-        time.sleep(1)
+    except KeyboardInterrupt:
+        print("\n\nSimulation stopped by user.")
+        print("Final Statistics:")
+        sim.print_final_stats()
 
-except KeyboardInterrupt:
-    print("\n\nSimulation stopped by user.")
-    print("Final Statistics:")
-    print("Total vehicles served:", total_served)
-    print("Served per road:", served_per_road)
-    print("Priority activations:", priority_activations)
+        sim.export_history()
+        sim.log_event("Simulation stopped manually")
 
-    export_history()
-    log_event("Simulation stopped manually")
+        print("History exported. Exiting safely.")
 
-    print("History exported. Exiting safely.")
+    finally:
+        sim.close()
 
-except KeyboardInterrupt:
-    print("\nSimulation stopped.")
-    export_history()
 
+if __name__ == "__main__":
+    main()
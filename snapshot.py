@@ -0,0 +1,123 @@
+import struct
+from collections import namedtuple
+
+from traffic_manager import CarView, COLORS, DIRECTIONS, LANE_TYPES
+
+# ================= FORMAT =================
+# One 16-byte little-endian record per car:
+#   id (uint32), x, y (float32), w, h, color index (uint8 each),
+#   bits (uint8): lane code | direction << 1 | turned << 3 | passed << 4 | in_queue << 5
+CAR_RECORD = struct.Struct("<IffBBBB")
+COLOR_CODES = {color: code for code, color in enumerate(COLORS)}
+
+TURNED, PASSED, IN_QUEUE = 1 << 3, 1 << 4, 1 << 5
+
+
+def car_dtype():
+    """numpy dtype matching CAR_RECORD (numpy is only needed for array access)"""
+    import numpy as np
+    return np.dtype([
+        ("id", "<u4"), ("x", "<f4"), ("y", "<f4"), ("w", "u1"),
+        ("h", "u1"), ("color", "u1"), ("bits", "u1")
+    ])
+
+
+def pack_bits(lane, direction, turned, passed, in_queue):
+    return (lane | direction << 1 | (TURNED if turned else 0) |
+            (PASSED if passed else 0) | (IN_QUEUE if in_queue else 0))
+
+
+def pack_cars(cars):
+    """Records for CarLogic objects, as one bytes object"""
+    data = bytearray(CAR_RECORD.size * len(cars))
+    pack_into = CAR_RECORD.pack_into
+    offset = 0
+    for car in cars:
+        pack_into(data, offset, car.id, car.x, car.y, car.w, car.h, COLOR_CODES[car.color],
+                  pack_bits(car.lane_code, car.current_code, car.turned, car.passed,
+                            car.in_queue))
+        offset += CAR_RECORD.size
+    return bytes(data)
+
+
+def unpack_car(record):
+    car_id, x, y, w, h, color, bits = record
+    return CarView(car_id, x, y, w, h, COLORS[color], LANE_TYPES[bits & 1],
+                   DIRECTIONS[(bits >> 1) & 3], bool(bits & TURNED),
+                   bool(bits & PASSED), bool(bits & IN_QUEUE))
+
+# ================= PACKED CARS =================
+class PackedCars:
+    """Read-only car records over an immutable bytes buffer
+
+    Iterating yields CarViews; array() is a zero-copy numpy view and ids()
+    reads just the id column.  Nothing here refers back to the manager, so
+    a PackedCars can be handed to other threads or processes as is.
+    """
+    def __init__(self, data=b""):
+        self.data = bytes(data)
+        self.view = memoryview(self.data)
+
+    def __len__(self):
+        return len(self.data) // CAR_RECORD.size
+
+    def __iter__(self):
+        for record in CAR_RECORD.iter_unpack(self.data):
+            yield unpack_car(record)
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("car index out of range")
+        return unpack_car(CAR_RECORD.unpack_from(self.data, index * CAR_RECORD.size))
+
+    def record(self, index):
+        """Raw bytes of one car (a memoryview slice, no copy)"""
+        start = index * CAR_RECORD.size
+        return self.view[start:start + CAR_RECORD.size]
+
+    def ids(self):
+        return [car_id for car_id, *_ in CAR_RECORD.iter_unpack(self.data)]
+
+    def array(self):
+        import numpy as np
+        return np.frombuffer(self.data, dtype=car_dtype())
+
+# ================= SNAPSHOTS & DIFFS =================
+# Everything a renderer or exporter needs for one frame (frame = tick_count)
+Snapshot = namedtuple("Snapshot", ["frame", "lights", "queues", "cars"])
+
+# What changed between frame `since` and `frame`.  spawned and moved hold the
+# new records (moved = any car whose record changed: position, size or
+# state); reset=True means `since` was unknown and spawned holds every car.
+SnapshotDiff = namedtuple("SnapshotDiff", [
+    "frame", "since", "lights", "queues", "spawned", "moved", "despawned", "reset"
+])
+
+
+def diff(old, new):
+    """SnapshotDiff from Snapshot old to Snapshot new (old=None -> reset)"""
+    if old is None:
+        return SnapshotDiff(new.frame, None, new.lights, new.queues, new.cars,
+                            PackedCars(), (), True)
+
+    size = CAR_RECORD.size
+    before = {}
+    for index, car_id in enumerate(old.cars.ids()):
+        before[car_id] = index
+    old_view = old.cars.view
+    new_view = new.cars.view
+
+    spawned = bytearray()
+    moved = bytearray()
+    for index, car_id in enumerate(new.cars.ids()):
+        start = index * size
+        record = new_view[start:start + size]
+        old_index = before.pop(car_id, None)
+        if old_index is None:
+            spawned += record
+        elif old_view[old_index * size:(old_index + 1) * size] != record:
+            moved += record
+    return SnapshotDiff(new.frame, old.frame, new.lights, new.queues, PackedCars(spawned),
+                        PackedCars(moved), tuple(before), False)
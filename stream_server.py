@@ -0,0 +1,300 @@
+import argparse
+import asyncio
+import json
+import random
+import socket
+import time
+
+from headless import RandomArrivals, make_manager
+from sim_thread import SimulationThread
+from snapshot import diff
+from traffic_manager import TrafficManager
+
+HOST = "127.0.0.1"
+PORT = 8765
+RATE = 10            # frames per second sent to each client, at most
+STATS_EVERY = 33     # ticks between metric refreshes (~1 s of virtual time)
+SEND_BUFFER = 16 * 1024   # bytes queued per client before it counts as slow
+
+
+# ================= ENCODING =================
+def encode_delta(old, new, stats):
+    """JSON-ready delta of one intersection from Snapshot old (or None) to new"""
+    change = diff(old, new)
+    message = {
+        "frame": change.frame,
+        "since": change.since,
+        "reset": change.reset,
+        "lights": change.lights,
+        "queues": change.queues,
+        "spawned": [[car.id, car.x, car.y, car.w, car.h, car.color, car.lane_type]
+                    for car in change.spawned],
+        "moved": [[car.id, car.x, car.y, car.w, car.h] for car in change.moved],
+        "despawned": list(change.despawned),
+    }
+    if stats is not None:
+        message["stats"] = {
+            "mean_wait": stats["wait"]["mean"],
+            "p95_wait": stats["wait"]["p95"],
+            "served": stats["throughput"]["total"],
+            "throughput_per_min": stats["throughput"]["per_minute"],
+            "max_queue": stats["max_queue"],
+        }
+    return message
+
+
+def encode_line(message):
+    return (json.dumps(message, separators=(",", ":")) + "\n").encode()
+
+# ================= SERVER =================
+class Client:
+    """One subscriber: the snapshots it last received and a wake-up flag"""
+    def __init__(self, writer):
+        self.writer = writer
+        self.wake = asyncio.Event()
+        self.sent = {}       # intersection -> Snapshot the client now holds
+        self.seq = 0         # last broadcast sequence number sent
+        self.frames_sent = 0
+        self.frames_dropped = 0
+        self.closed = False
+
+
+class StreamServer:
+    """Pushes the state of several simulated intersections to TCP subscribers
+
+    The protocol is newline-delimited JSON.  A client first receives a
+    "hello" line, then "frame" lines holding, per intersection, only the
+    cars spawned, moved or despawned since the frame that client last got.
+    Frames are published at most `rate` times a second.  A client that
+    cannot keep up is never queued for: when it is ready again it gets one
+    delta straight to the newest frame, and the frames in between are
+    counted as dropped.  Sending "reset" asks for full state.
+    """
+    def __init__(self, simulations, rate=RATE):
+        self.simulations = simulations   # name -> running SimulationThread
+        self.rate = rate
+        self.clients = set()
+        self.seq = 0
+        self.latest = {}                 # name -> (Snapshot, stats)
+        self.encoded = {}                # per-broadcast cache: client frames -> line
+        self.server = None
+
+    async def start(self, host=HOST, port=PORT):
+        self.server = await asyncio.start_server(self.handle, host, port)
+        self.broadcaster = asyncio.create_task(self.broadcast())
+        return self.server
+
+    async def close(self):
+        self.broadcaster.cancel()
+        self.server.close()
+        for client in list(self.clients):
+            client.closed = True
+            client.wake.set()
+        await self.server.wait_closed()
+
+    async def broadcast(self):
+        """Publish the newest snapshots at most `rate` times a second"""
+        interval = 1 / self.rate
+        while True:
+            started = time.perf_counter()
+            latest = {name: (simulation.frames[1].snapshot, simulation.stats)
+                      for name, simulation in self.simulations.items()}
+            if any(self.latest.get(name, (None,))[0] is not snapshot
+                   for name, (snapshot, _) in latest.items()):
+                self.seq += 1
+                self.latest = latest
+                self.encoded = {}
+                for client in self.clients:
+                    client.wake.set()
+            await asyncio.sleep(max(0.0, interval - (time.perf_counter() - started)))
+
+    def frame_line(self, client):
+        """Delta line for client; clients holding the same frames share one encoding"""
+        key = tuple(getattr(client.sent.get(name), "frame", None) for name in self.latest)
+        line = self.encoded.get(key)
+        if line is None:
+            line = encode_line({
+                "type": "frame",
+                "seq": self.seq,
+                "intersections": {
+                    name: encode_delta(client.sent.get(name), snapshot, stats)
+                    for name, (snapshot, stats) in self.latest.items()
+                },
+            })
+            self.encoded[key] = line
+        return line
+
+    async def handle(self, reader, writer):
+        # Keep the kernel and transport buffers small, so a slow reader makes
+        # drain() wait (and frames get skipped) instead of piling up latency
+        sock = writer.get_extra_info("socket")
+        if sock is not None:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, SEND_BUFFER)
+        writer.transport.set_write_buffer_limits(high=SEND_BUFFER)
+        client = Client(writer)
+        self.clients.add(client)
+        commands = asyncio.create_task(self.read_commands(reader, client))
+        try:
+            writer.write(encode_line({"type": "hello", "rate": self.rate,
+                                      "intersections": list(self.simulations)}))
+            while not client.closed:
+                await client.wake.wait()
+                client.wake.clear()
+                if client.closed or client.seq == self.seq:
+                    continue
+                if client.seq:
+                    client.frames_dropped += self.seq - client.seq - 1
+                writer.write(self.frame_line(client))
+                client.seq = self.seq
+                client.sent = {name: snapshot for name, (snapshot, _) in self.latest.items()}
+                client.frames_sent += 1
+                # Only this client waits here; the others keep getting frames
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self.clients.discard(client)
+            commands.cancel()
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except (ConnectionError, OSError):
+                pass
+
+    async def read_commands(self, reader, client):
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            if line.strip() == b"reset":
+                client.sent = {}
+                client.seq = 0
+                client.wake.set()
+        client.closed = True
+        client.wake.set()
+
+    def status(self):
+        """Client count and frames sent / skipped so far (including frames a
+        client still waiting in drain() is going to skip)"""
+        dropped = 0
+        for client in self.clients:
+            dropped += client.frames_dropped
+            if client.seq:
+                dropped += max(0, self.seq - client.seq - 1)
+        return {
+            "clients": len(self.clients),
+            "seq": self.seq,
+            "sent": sum(client.frames_sent for client in self.clients),
+            "dropped": dropped,
+        }
+
+# ================= WATCH CLIENT =================
+async def watch(host=HOST, port=PORT, seconds=None):
+    """Print one summary line per intersection and second from a running server"""
+    reader, writer = await asyncio.open_connection(host, port)
+    state = {}    # name -> {"cars": {id: [...]}, "lights", "queues", "stats"}
+    started = last_print = time.perf_counter()
+    try:
+        while seconds is None or time.perf_counter() - started < seconds:
+            line = await reader.readline()
+            if not line:
+                break
+            message = json.loads(line)
+            if message["type"] != "frame":
+                continue
+            for name, delta in message["intersections"].items():
+                view = state.setdefault(name, {"cars": {}})
+                if delta["reset"]:
+                    view["cars"] = {}
+                for car_id in delta["despawned"]:
+                    view["cars"].pop(car_id, None)
+                for car in delta["spawned"]:
+                    view["cars"][car[0]] = car
+                for car in delta["moved"]:
+                    view["cars"][car[0]][1:5] = car[1:]
+                view.update(frame=delta["frame"], lights=delta["lights"],
+                            queues=delta["queues"], stats=delta.get("stats"))
+
+            if time.perf_counter() - last_print >= 1:
+                last_print = time.perf_counter()
+                for name, view in sorted(state.items()):
+                    stats = view["stats"] or {}
+                    print(f"{name}: frame {view['frame']} cars {len(view['cars'])} "
+                          f"green {view['lights']} queues {view['queues']} "
+                          f"mean wait {stats.get('mean_wait', 0):.1f}s "
+                          f"served {stats.get('served', 0)}")
+    finally:
+        writer.close()
+
+
+def make_simulations(count, engine, speed, seed, input_file=None):
+    """`count` intersections on their own threads (the first reads input_file if given)"""
+    simulations = {}
+    for i in range(count):
+        rng = random.Random(seed + i)
+        if i == 0 and input_file is not None:
+            manager, arrivals = TrafficManager(input_file=input_file, rng=rng), None
+        else:
+            manager = make_manager(engine, rng, {"verbose": False})
+            arrivals = RandomArrivals(random.Random(f"{seed}:{i}"))
+        simulations[f"i{i}"] = SimulationThread(manager, speed, arrivals,
+                                                stats_every=STATS_EVERY)
+    return simulations
+
+
+async def serve(args):
+    simulations = make_simulations(args.intersections, args.engine, args.speed, args.seed,
+                                   args.input)
+    for simulation in simulations.values():
+        simulation.start()
+    server = StreamServer(simulations, args.rate)
+    await server.start(args.host, args.port)
+    print(f"Streaming {len(simulations)} intersection(s) on {args.host}:{args.port} "
+          f"at up to {args.rate:g} frames/s")
+    try:
+        while True:
+            await asyncio.sleep(5)
+            status = server.status()
+            print(f"clients {status['clients']}, frame {status['seq']}, "
+                  f"dropped for slow clients {status['dropped']}")
+    finally:
+        await server.close()
+        for simulation in simulations.values():
+            simulation.stop()
+            simulation.manager.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stream live intersection state over TCP")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    serve_parser = commands.add_parser("serve", help="run intersections and stream them")
+    serve_parser.add_argument("--host", default=HOST)
+    serve_parser.add_argument("--port", type=int, default=PORT)
+    serve_parser.add_argument("--intersections", type=int, default=1)
+    serve_parser.add_argument("--engine", choices=["object", "vector"], default="object")
+    serve_parser.add_argument("--speed", type=float, default=1.0,
+                              help="simulation speed relative to real time")
+    serve_parser.add_argument("--rate", type=float, default=RATE,
+                              help="maximum frames per second per client")
+    serve_parser.add_argument("--seed", type=int, default=0)
+    serve_parser.add_argument("--input", default=None,
+                              help="feed the first intersection from this generator file")
+
+    watch_parser = commands.add_parser("watch", help="print a running server's state")
+    watch_parser.add_argument("--host", default=HOST)
+    watch_parser.add_argument("--port", type=int, default=PORT)
+    watch_parser.add_argument("--seconds", type=float, default=None)
+    args = parser.parse_args()
+
+    try:
+        if args.command == "serve":
+            asyncio.run(serve(args))
+        else:
+            asyncio.run(watch(args.host, args.port, args.seconds))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+import argparse
+import csv
+import itertools
+import json
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import event_sim
+import headless
+import traffic_manager
+
+# Settings a sweep may vary, per target: only ones the run actually reads.
+# Sweeps use the default round_robin controller, which ignores the other
+# strategies' timings.
+TUNABLE = {
+    "headless": [key for key, value in traffic_manager.DEFAULT_CONFIG.items()
+                 if isinstance(value, (int, float)) and not isinstance(value, bool)
+                 and key not in ("max_green", "gap_time", "pressure_period")],
+    "event": [key for key in event_sim.CONFIG_KEYS if key != "stats_print_interval"],
+}
+METRICS = ["throughput_per_min", "mean_wait", "p95_wait", "max_queue"]
+
+
+# ================= SEARCH SPACE =================
+def parse_number(text):
+    return float(text) if "." in text else int(text)
+
+
+def parse_grid(specs, target):
+    """["time_per_car=600,800"] -> {"time_per_car": [600, 800]}"""
+    grid = {}
+    for spec in specs:
+        name, _, values = spec.partition("=")
+        if name not in TUNABLE[target]:
+            raise SystemExit(f"{name} is not tunable for {target} (choose from {TUNABLE[target]})")
+        grid[name] = [parse_number(value) for value in values.split(",")]
+    return grid
+
+
+def grid_configs(grid):
+    """Every combination of the grid values"""
+    names = list(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*grid.values())]
+
+
+def random_configs(ranges, count, rng):
+    """`count` configs drawn uniformly from {"name": [low, high]} ranges
+
+    Integer bounds give integer draws.
+    """
+    for name, bounds in ranges.items():
+        if len(bounds) != 2:
+            raise SystemExit(f"{name} needs a LOW,HIGH range for --random, got {len(bounds)} value(s)")
+    configs = []
+    for _ in range(count):
+        config = {}
+        for name, (low, high) in ranges.items():
+            if isinstance(low, int) and isinstance(high, int):
+                config[name] = rng.randint(low, high)
+            else:
+                config[name] = rng.uniform(low, high)
+        configs.append(config)
+    return configs
+
+# ================= WORKERS =================
+def run_one(job):
+    """Run one seeded simulation in a worker process; returns METRICS"""
+    target, config, seed, minutes = job
+    if target == "headless":
+        ticks = int(minutes * 60000 / traffic_manager.TICK_MS)
+        summary = headless.run(ticks, seed=seed, config={**config, "verbose": False})
+    else:
+        from event_sim import EventSimulator
+        arrivals = headless.RandomArrivals(random.Random(seed))
+        summary = EventSimulator(arrivals, config=config).run(until=minutes * 60)
+        summary["throughput_per_min"] = summary["served"] / minutes
+    return {metric: summary[metric] for metric in METRICS}
+
+
+def sweep(target, configs, seeds, minutes, workers=None):
+    """Run every config with every seed in parallel; one averaged row per config
+
+    All configs share the same seeds, so they are compared on identical demand.
+    """
+    jobs = [(target, config, seed, minutes) for config in configs for seed in seeds]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(run_one, jobs))
+
+    rows = []
+    for i, config in enumerate(configs):
+        runs = results[i * len(seeds):(i + 1) * len(seeds)]
+        row = dict(config)
+        for metric in METRICS:
+            values = [run[metric] for run in runs]
+            row[metric] = max(values) if metric == "max_queue" else sum(values) / len(values)
+        rows.append(row)
+    return rows
+
+# ================= OUTPUT =================
+def print_table(rows, columns):
+    widths = [max(len(column), 10) for column in columns]
+    print("  ".join(column.rjust(width) for column, width in zip(columns, widths)))
+    for row in rows:
+        cells = []
+        for column, width in zip(columns, widths):
+            value = row[column]
+            cells.append((f"{value:.2f}" if isinstance(value, float) else str(value)).rjust(width))
+        print("  ".join(cells))
+
+
+def save(rows, columns, path):
+    if path.endswith(".json"):
+        with open(path, "w") as f:
+            json.dump(rows, f, indent=2)
+        return
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=columns)
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parallel sweep over signal timing settings")
+    parser.add_argument("--target", choices=["headless", "event"], default="headless",
+                        help="TrafficManager (headless) or the queue simulator (event)")
+    parser.add_argument("--grid", nargs="*", default=[], metavar="NAME=V1,V2",
+                        help="grid values per setting")
+    parser.add_argument("--random", type=int, default=None, metavar="N",
+                        help="draw N random configs; --grid NAME=LOW,HIGH gives the range")
+    parser.add_argument("--seeds", type=int, default=3, help="replications per config")
+    parser.add_argument("--seed", type=int, default=0, help="first demand seed")
+    parser.add_argument("--minutes", type=float, default=10, help="simulated minutes per run")
+    parser.add_argument("--workers", type=int, default=None, help="default: all cores")
+    parser.add_argument("--sort", default="mean_wait", choices=METRICS)
+    parser.add_argument("--output", default=None, help="write the table as .csv or .json")
+    args = parser.parse_args()
+
+    grid = parse_grid(args.grid, args.target)
+    if args.random is not None:
+        configs = random_configs(grid, args.random, random.Random(args.seed))
+    else:
+        configs = grid_configs(grid)
+    seeds = list(range(args.seed, args.seed + args.seeds))
+
+    print(f"Running {len(configs)} configs x {len(seeds)} seeds "
+          f"on {args.workers or os.cpu_count()} workers...")
+    started = time.perf_counter()
+    rows = sweep(args.target, configs, seeds, args.minutes, args.workers)
+    rows.sort(key=lambda row: row[args.sort])
+    print(f"Done in {time.perf_counter() - started:.1f} s\n")
+
+    columns = list(grid) + METRICS
+    print_table(rows, columns)
+    if args.output:
+        save(rows, columns, args.output)
+        print(f"\nResults written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+import random
+
+from headless import RandomArrivals, make_manager
+from traffic_manager import TICK_MS
+
+SEED = 7
+TICKS = 3000
+SPAWN_MIN, SPAWN_MAX = 0.2, 0.6   # heavy demand so queues build up
+
+
+def state(manager):
+    """Everything both engines should agree on after a tick"""
+    cars = manager.get_state()["cars"]
+    return (
+        [(car.id, round(car.x, 6), round(car.y, 6), car.color, car.current_direction,
+          car.turned, car.passed, car.in_queue) for car in cars],
+        manager.current_green,
+        {direction: list(queue) for direction, queue in manager.lane_queues.items()},
+        dict(manager.waiting),
+    )
+
+
+def run(engine):
+    rng = random.Random(SEED)
+    manager = make_manager(engine, rng)
+    arrivals = RandomArrivals(rng, SPAWN_MIN, SPAWN_MAX)
+    try:
+        for tick in range(TICKS):
+            for _, direction, lane_type in arrivals.due(tick * TICK_MS):
+                manager.spawn_car(direction, lane_type)
+            manager.update()
+            yield state(manager)
+    finally:
+        manager.close()
+
+
+# The NumPy engine must step tick for tick like the object engine
+most = 0
+for tick, (expected, actual) in enumerate(zip(run("object"), run("vector"))):
+    assert expected == actual, f"engines diverged at tick {tick}"
+    most = max(most, len(expected[0]))
+
+print("Ticks compared:", TICKS)
+print("Most cars on screen:", most)
@@ -0,0 +1,52 @@
+import os
+import tempfile
+
+import ingest
+
+# Exercise the portable os.stat fallback rather than inotify
+ingest._libc = None
+
+folder = tempfile.mkdtemp()
+path = os.path.join(folder, "input.txt")
+offsets = os.path.join(folder, "input.offset")
+
+
+def append(text):
+    with open(path, "a") as f:
+        f.write(text)
+
+
+# Partial lines wait until their newline arrives
+reader = ingest.TailReader(path, offset_file=offsets)
+assert isinstance(reader.watch, ingest.StatWatch)
+append("up,turn\ndown,str")
+print("Partial:", reader.read_lines())
+append("aight\n")
+lines = reader.read_lines()
+print("Completed:", lines)
+assert lines == ["down,straight"]
+reader.close()
+
+# A restart resumes from the checkpoint without repeating or losing lines
+append("left,turn\n")
+reader = ingest.TailReader(path, offset_file=offsets)
+lines = reader.read_lines()
+print("After restart:", lines)
+assert lines == ["left,turn"]
+
+# Truncated and regrown past the old offset between two polls
+with open(path, "w") as f:
+    f.write("right,turn\n" * 10)
+lines = reader.read_lines()
+print("After truncate:", len(lines), "lines")
+assert lines == ["right,turn"] * 10
+
+# Rotation: the old file is finished, then the new one is followed
+append("up,straight\n")
+os.replace(path, path + ".1")
+with open(path, "w") as f:
+    f.write("down,turn\n")
+lines = reader.read_lines()
+print("After rotation:", lines)
+assert lines == ["up,straight", "down,turn"]
+reader.close()
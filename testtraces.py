@@ -0,0 +1,24 @@
+import os
+import random
+import tempfile
+
+import records
+import traces
+
+path = os.path.join(tempfile.mkdtemp(), "trace.bin")
+
+count = traces.record(traces.PoissonArrivals(random.Random(1)), path, 600)
+print("Recorded:", count)
+
+# Recording again replaces the trace instead of appending a second stream
+again = traces.record(traces.PoissonArrivals(random.Random(1)), path, 600)
+with records.RecordFile(path) as trace:
+    print("Records after re-recording:", len(trace))
+    assert len(trace) == again == count
+    times = [record[0] for record in trace]
+    assert times == sorted(times)
+
+# The headless replay spawns every arrival, including the last one
+summary = traces.replay(path, target="headless")
+print("Spawned on replay:", summary["spawned"])
+assert summary["spawned"] == count
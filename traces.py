@@ -0,0 +1,234 @@
+import argparse
+import math
+import random
+
+import records
+
+DIRECTIONS = records.DIRECTIONS
+LANE_TYPES = records.LANE_TYPES
+TURN_CHANCE = 0.3
+
+# (centre, width, extra vehicles per second), seconds since midnight
+RUSH_HOURS = ((8 * 3600, 3600, 1.5), (17.5 * 3600, 3600, 1.5))
+
+
+# ================= ARRIVAL SOURCES =================
+class Arrivals:
+    """Arrival stream with the same next_arrival()/due() interface as
+    headless.RandomArrivals; subclasses implement generate()
+
+    generate() returns (time_ms, direction, lane_type), or None once a
+    finite stream (a trace) is exhausted.
+    """
+    def __init__(self):
+        self.upcoming = None
+        self.finished = False
+
+    def generate(self):
+        raise NotImplementedError
+
+    def peek(self):
+        if self.upcoming is None and not self.finished:
+            self.upcoming = self.generate()
+            self.finished = self.upcoming is None
+        return self.upcoming
+
+    def next_arrival(self):
+        arrival = self.peek()
+        self.upcoming = None
+        return arrival
+
+    def due(self, now_ms):
+        """Yield (time_ms, direction, lane_type) for every arrival up to now_ms"""
+        while self.peek() is not None and self.upcoming[0] <= now_ms:
+            yield self.next_arrival()
+
+
+class PoissonArrivals(Arrivals):
+    """Exponential gaps at `rate` vehicles/s, optionally skewed per road
+
+    weights gives the relative demand of up/down/left/right (roads A-D).
+    """
+    def __init__(self, rng, rate=1.25, weights=None, turn_chance=TURN_CHANCE):
+        super().__init__()
+        self.rng = rng
+        self.rate = rate
+        self.weights = weights
+        self.turn_chance = turn_chance
+        self.time = 0.0
+
+    def pick(self):
+        if self.weights is None:
+            direction = self.rng.choice(DIRECTIONS)
+        else:
+            direction = self.rng.choices(DIRECTIONS, self.weights)[0]
+        lane_type = "turn" if self.rng.random() < self.turn_chance else "straight"
+        return direction, lane_type
+
+    def generate(self):
+        self.time += self.rng.expovariate(self.rate)
+        return (self.time * 1000, *self.pick())
+
+
+class RushHourArrivals(PoissonArrivals):
+    """Poisson demand whose rate follows a daily curve with Gaussian peaks
+
+    The run starts at `start` seconds after midnight.  Arrivals are drawn at
+    the peak rate and thinned (Lewis-Shedler) down to the curve.
+    """
+    def __init__(self, rng, rate=0.5, peaks=RUSH_HOURS, start=6 * 3600,
+                 weights=None, turn_chance=TURN_CHANCE):
+        super().__init__(rng, rate, weights, turn_chance)
+        self.peaks = peaks
+        self.start = start
+        self.max_rate = rate + sum(extra for _, _, extra in peaks)
+
+    def rate_at(self, seconds):
+        clock = (self.start + seconds) % 86400
+        return self.rate + sum(
+            extra * math.exp(-0.5 * ((clock - centre) / width) ** 2)
+            for centre, width, extra in self.peaks
+        )
+
+    def generate(self):
+        while True:
+            self.time += self.rng.expovariate(self.max_rate)
+            if self.rng.random() * self.max_rate <= self.rate_at(self.time):
+                return (self.time * 1000, *self.pick())
+
+
+class TraceArrivals(Arrivals):
+    """Replay a recorded trace; times are relative to its first record"""
+    def __init__(self, path):
+        super().__init__()
+        self.file = records.RecordFile(path)
+        self.stream = iter(self.file)
+        self.origin = self.file[0][0] if len(self.file) else 0.0
+
+    def __len__(self):
+        return len(self.file)
+
+    def generate(self):
+        for time, _, direction, lane, _ in self.stream:
+            return (time - self.origin) * 1000, DIRECTIONS[direction], LANE_TYPES[lane]
+        return None
+
+    def close(self):
+        self.stream = iter(())
+        self.file.close()
+
+
+# ================= RECORDING =================
+def record(arrivals, path, seconds):
+    """Write every arrival in the first `seconds` of a stream to a trace file
+
+    An existing file at `path` is replaced, not appended to.
+    """
+    writer = records.RecordWriter(path, truncate=True)
+    first = writer.next_id
+    chunk = []
+    try:
+        while arrivals.peek() is not None and arrivals.upcoming[0] < seconds * 1000:
+            when, direction, lane_type = arrivals.next_arrival()
+            chunk.append(writer.encode(when / 1000, records.DIRECTION_CODES[direction],
+                                       records.LANE_CODES[lane_type]))
+            if len(chunk) >= 4096:
+                writer.write_bytes(b"".join(chunk))
+                chunk.clear()
+        writer.write_bytes(b"".join(chunk))
+    finally:
+        writer.close()
+    return writer.next_id - first
+
+
+def make_profile(name, rng, rate, weights=None):
+    if name == "rush":
+        return RushHourArrivals(rng, rate, weights=weights)
+    return PoissonArrivals(rng, rate, weights)
+
+
+# ================= REPLAY =================
+def replay(path, target="headless", speed=None, seconds=None, engine="object"):
+    """Feed a trace into headless.run, the queue simulator or the event simulator
+
+    speed=None replays as fast as possible, 1 in real time, N at N x (the
+    event simulator always runs as fast as possible).
+    """
+    arrivals = TraceArrivals(path)
+    try:
+        if len(arrivals) == 0:
+            return {}
+        if seconds is None:
+            seconds = arrivals.file[-1][0] - arrivals.origin
+
+        if target == "headless":
+            import headless
+            from traffic_manager import TICK_MS
+            ticks = math.ceil(seconds * 1000 / TICK_MS) + 1
+            return headless.run(ticks, engine=engine, speed=speed, arrivals=arrivals)
+
+        if target == "event":
+            from event_sim import EventSimulator
+            return EventSimulator(arrivals).run(until=seconds)
+
+        from clock import ScaledClock, VirtualClock
+        from simulator import Simulator
+        clock = VirtualClock() if speed is None else ScaledClock(speed)
+        sim = Simulator(clock=clock, input_file=None, log_file=None,
+                        history_file=None, verbose=False)
+        while sim.elapsed() < seconds:
+            sim.run(1, arrivals)
+        return {
+            "simulated_seconds": sim.elapsed(),
+            "cycles": sim.cycle_count,
+            "served": sim.total_served,
+            "served_per_road": dict(sim.served_per_road),
+            "priority_activations": sim.priority_activations,
+        }
+    finally:
+        arrivals.close()
+
+
+# ================= CLI =================
+def main():
+    parser = argparse.ArgumentParser(description="Record and replay arrival traces")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    rec = commands.add_parser("record", help="write a synthetic trace")
+    rec.add_argument("path")
+    rec.add_argument("--profile", choices=["poisson", "rush"], default="poisson")
+    rec.add_argument("--rate", type=float, default=1.25,
+                     help="vehicles per second (base rate for rush)")
+    rec.add_argument("--skew", default=None,
+                     help="relative demand up,down,left,right e.g. 4,1,1,1")
+    rec.add_argument("--seconds", type=float, default=3600)
+    rec.add_argument("--seed", type=int, default=None)
+
+    play = commands.add_parser("replay", help="replay a trace")
+    play.add_argument("path")
+    play.add_argument("--target", choices=["headless", "simulator", "event"], default="headless")
+    play.add_argument("--engine", choices=["object", "vector"], default="object")
+    play.add_argument("--speed", type=float, default=None,
+                      help="N x real time (default: as fast as possible)")
+    play.add_argument("--seconds", type=float, default=None,
+                      help="stop after this much trace time (default: whole trace)")
+    args = parser.parse_args()
+
+    if args.command == "record":
+        weights = [float(w) for w in args.skew.split(",")] if args.skew else None
+        arrivals = make_profile(args.profile, random.Random(args.seed), args.rate, weights)
+        count = record(arrivals, args.path, args.seconds)
+        print(f"Recorded {count} arrivals over {args.seconds:.0f} s to {args.path}")
+        return
+
+    summary = replay(args.path, args.target, args.speed, args.seconds, args.engine)
+    print("=" * 50)
+    print("REPLAY FINISHED")
+    print("=" * 50)
+    for key, value in summary.items():
+        print(f"{key}: {value:.2f}" if isinstance(value, float) else f"{key}: {value}")
+    print("=" * 50)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,11 @@
 import random
-import os
+from bisect import bisect_left, bisect_right
+from collections import deque, namedtuple
+
+from controllers import make_controller
+from ingest import TailReader
+from metrics import TrafficStats
+from profiler import FrameProfiler
 
 # ================= CONSTANTS =================
 WIDTH = 700
@@ -14,6 +20,7 @@ INTERSECTION = {
 
 CAR_SPEED = 3
 GAP = 40
+TICK_MS = 30  # virtual time per update() call
 
 # Traffic Control Constants
 TIME_PER_CAR = 800
@@ -22,6 +29,29 @@ PRIORITY_LANE = "up"
 PRIORITY_THRESHOLD = 10
 PRIORITY_RELEASE = 5
 STARTUP_BUFFER = 3000
+PRIORITY_EXTRA = 2000     # added to the priority lane's green
+MAX_GREEN = 20000         # cap for the longest_queue and actuated strategies
+GAP_TIME = 1000           # actuated: green extension while cars keep coming
+PRESSURE_PERIOD = 2000    # max_pressure: decision interval
+CYCLE_ORDER = ["up", "left", "down", "right"]
+
+SNAPSHOT_HISTORY = 64   # recent snapshots kept so snapshot(since=...) can diff
+
+# Per-instance settings: TrafficManager(config={...}) overrides any of these
+DEFAULT_CONFIG = {
+    "time_per_car": TIME_PER_CAR,
+    "min_duration": MIN_DURATION,
+    "priority_lane": PRIORITY_LANE,
+    "priority_threshold": PRIORITY_THRESHOLD,
+    "priority_release": PRIORITY_RELEASE,
+    "startup_buffer": STARTUP_BUFFER,
+    "controller": "round_robin",   # a name in controllers.CONTROLLERS or a Controller
+    "max_green": MAX_GREEN,
+    "gap_time": GAP_TIME,
+    "pressure_period": PRESSURE_PERIOD,
+    "downstream": None,   # phase -> vehicles queued past that exit (see controllers.py)
+    "verbose": True,   # print priority mode changes
+}
 
 # Lane Centers
 VERT_LEFT = 303
@@ -37,111 +67,107 @@ STOP_DOWN = INTERSECTION['y1'] - 10
 STOP_RIGHT = INTERSECTION['x1'] - 10
 STOP_LEFT = INTERSECTION['x2'] + 10
 
+# ================= CODES & TABLES =================
+# Directions and lane types are small ints on the hot path; the names are
+# only looked up at the edges (input lines, queues, stats, the visualizer)
+UP, DOWN, LEFT, RIGHT = 0, 1, 2, 3
+DIRECTIONS = ["up", "down", "left", "right"]
+DIRECTION_CODES = {name: code for code, name in enumerate(DIRECTIONS)}
+STRAIGHT, TURN = 0, 1
+LANE_TYPES = ["straight", "turn"]
+LANE_CODES = {name: code for code, name in enumerate(LANE_TYPES)}
+
+COLORS = ["#FF4444", "#4444FF", "#FFCC00", "#00CC66", "#FF8800", "#CC00CC"]
+
+# [direction][lane type] -> (x, y, w, h, target_lane)
+SPAWN_TABLE = [
+    [(VERT_MIDDLE, HEIGHT + 40, 22, 30, None), (VERT_LEFT, HEIGHT + 40, 22, 30, HORZ_BOTTOM)],
+    [(VERT_MIDDLE, -40, 22, 30, None), (VERT_RIGHT, -40, 22, 30, HORZ_TOP)],
+    [(WIDTH + 40, HORZ_MIDDLE, 30, 22, None), (WIDTH + 40, HORZ_BOTTOM, 30, 22, VERT_RIGHT)],
+    [(-40, HORZ_MIDDLE, 30, 22, None), (-40, HORZ_TOP, 30, 22, VERT_LEFT)],
+]
+
+# Indexed by direction code
+SIGNS = [-1, 1, -1, 1]             # travel position = coordinate * sign
+STEPS = [(0, -CAR_SPEED), (0, CAR_SPEED), (-CAR_SPEED, 0), (CAR_SPEED, 0)]
+TURN_TO = [LEFT, RIGHT, DOWN, UP]  # spawn direction -> direction after turning
+STOP_AT = [-STOP_UP, STOP_DOWN, -STOP_LEFT, STOP_RIGHT]   # as travel positions
+PASSED_AT = [
+    -(INTERSECTION['y1'] - 30), INTERSECTION['y2'] + 30,
+    -(INTERSECTION['x1'] - 30), INTERSECTION['x2'] + 30
+]
+
 # ================= CAR LOGIC CLASS =================
 class CarLogic:
-    def __init__(self, car_id, direction, lane_type):
+    __slots__ = (
+        "id", "spawn_code", "current_code", "lane_code", "turned", "passed", "in_queue",
+        "spawned_at", "queued_at", "released_at", "despawned_at", "waited",
+        "color", "x", "y", "w", "h", "target_lane",
+    )
+    
+    def __init__(self, car_id, direction, lane_type, rng=random):
         self.id = car_id
-        self.spawn_direction = direction
-        self.lane_type = lane_type
-        self.current_direction = direction
+        self.spawn_code = self.current_code = DIRECTION_CODES[direction]
+        self.lane_code = LANE_CODES.get(lane_type, STRAIGHT)
         self.turned = False
         self.passed = False
         self.in_queue = False
         
-        # Generate random color
-        colors = ["#FF4444", "#4444FF", "#FFCC00", "#00CC66", "#FF8800", "#CC00CC"]
-        self.color = random.choice(colors)
+        # Virtual timestamps in ms (set by TrafficManager)
+        self.spawned_at = None
+        self.queued_at = None
+        self.released_at = None
+        self.despawned_at = None
+        self.waited = 0   # total ms spent queued at the stop line
         
-        # Initialize position and dimensions based on spawn direction
-        if direction == "up":
-            self.y = HEIGHT + 40
-            if lane_type == "turn":
-                self.x = VERT_LEFT
-                self.target_lane = HORZ_BOTTOM
-            else:
-                self.x = VERT_MIDDLE
-                self.target_lane = None
-            self.w, self.h = 22, 30
-            
-        elif direction == "down":
-            self.y = -40
-            if lane_type == "turn":
-                self.x = VERT_RIGHT
-                self.target_lane = HORZ_TOP
-            else:
-                self.x = VERT_MIDDLE
-                self.target_lane = None
-            self.w, self.h = 22, 30
-            
-        elif direction == "right":
-            self.x = -40
-            if lane_type == "turn":
-                self.y = HORZ_TOP
-                self.target_lane = VERT_LEFT
-            else:
-                self.y = HORZ_MIDDLE
-                self.target_lane = None
-            self.w, self.h = 30, 22
-            
-        elif direction == "left":
-            self.x = WIDTH + 40
-            if lane_type == "turn":
-                self.y = HORZ_BOTTOM
-                self.target_lane = VERT_RIGHT
-            else:
-                self.y = HORZ_MIDDLE
-                self.target_lane = None
-            self.w, self.h = 30, 22
+        self.color = rng.choice(COLORS)
+        
+        # Position and dimensions based on spawn direction and lane
+        self.x, self.y, self.w, self.h, self.target_lane = \
+            SPAWN_TABLE[self.spawn_code][self.lane_code]
+    
+    # Names for code outside the hot path (visualizer, tools)
+    @property
+    def spawn_direction(self):
+        return DIRECTIONS[self.spawn_code]
+    
+    @property
+    def current_direction(self):
+        return DIRECTIONS[self.current_code]
+    
+    @property
+    def lane_type(self):
+        return LANE_TYPES[self.lane_code]
+    
+    def travel_position(self):
+        """Position along the direction of travel (grows as the car moves)"""
+        code = self.current_code
+        return (self.y if code < LEFT else self.x) * SIGNS[code]
     
     def check_and_execute_turn(self):
         """Handle turning logic"""
-        if self.lane_type != "turn" or self.turned:
+        if self.lane_code != TURN or self.turned:
             return
         
-        turned = False
-        
-        if self.spawn_direction == "up":
-            if self.y <= self.target_lane:
-                self.y = self.target_lane
-                self.current_direction = "left"
-                turned = True
-                
-        elif self.spawn_direction == "down":
-            if self.y >= self.target_lane:
-                self.y = self.target_lane
-                self.current_direction = "right"
-                turned = True
-                
-        elif self.spawn_direction == "right":
-            if self.x >= self.target_lane:
-                self.x = self.target_lane
-                self.current_direction = "up"
-                turned = True
-                
-        elif self.spawn_direction == "left":
-            if self.x <= self.target_lane:
-                self.x = self.target_lane
-                self.current_direction = "down"
-                turned = True
+        code = self.spawn_code
+        if code < LEFT:
+            if (self.y - self.target_lane) * SIGNS[code] < 0:
+                return
+            self.y = self.target_lane
+        else:
+            if (self.x - self.target_lane) * SIGNS[code] < 0:
+                return
+            self.x = self.target_lane
         
-        if turned:
-            self.turned = True
-            self.w, self.h = self.h, self.w
+        self.current_code = TURN_TO[code]
+        self.turned = True
+        self.w, self.h = self.h, self.w
     
     def move(self):
         """Update car position"""
         self.check_and_execute_turn()
         
-        dx, dy = 0, 0
-        if self.current_direction == "up":
-            dy = -CAR_SPEED
-        elif self.current_direction == "down":
-            dy = CAR_SPEED
-        elif self.current_direction == "left":
-            dx = -CAR_SPEED
-        elif self.current_direction == "right":
-            dx = CAR_SPEED
-        
+        dx, dy = STEPS[self.current_code]
         self.x += dx
         self.y += dy
     
@@ -155,29 +181,185 @@ class CarLogic:
         """Check if car has left the visible area"""
         return (self.x < -60 or self.x > WIDTH + 60 or 
                 self.y < -60 or self.y > HEIGHT + 60)
+    
+    def delay(self):
+        """ms lost to lights and traffic: time on screen beyond free flow"""
+        on_screen = self.despawned_at - self.spawned_at
+        return max(0, on_screen - FREE_FLOW_MS[self.spawn_code][self.lane_code])
+
+
+def free_flow_ms(direction, lane):
+    """Time a car on path (direction, lane) needs to cross an empty screen"""
+    car = CarLogic(0, DIRECTIONS[direction], LANE_TYPES[lane], random.Random(0))
+    ticks = 0
+    while not car.off_screen():
+        car.move()
+        ticks += 1
+    return ticks * TICK_MS
+
+# [direction][lane type] -> ms from spawn to leaving the screen unimpeded
+FREE_FLOW_MS = [[free_flow_ms(direction, lane) for lane in (STRAIGHT, TURN)]
+                for direction in (UP, DOWN, LEFT, RIGHT)]
+
+# Read-only copy of a car's drawable state (snapshots, the vector engine)
+CarView = namedtuple("CarView", [
+    "id", "x", "y", "w", "h", "color", "lane_type",
+    "current_direction", "turned", "passed", "in_queue"
+])
+
+# ================= LANE INDEX =================
+class LaneIndex:
+    """Cars bucketed by lane id and kept sorted by travel position"""
+    def __init__(self, lane_of):
+        self.lane_of = lane_of
+        self.lanes = {}      # lane_id -> ([positions], [cars]), both sorted
+        self.entries = {}    # car.id -> (lane_id, position)
+    
+    def _locate(self, car):
+        """Return the lane bucket holding car and the car's index in it"""
+        lane_id, pos = self.entries[car.id]
+        positions, cars = self.lanes[lane_id]
+        i = bisect_left(positions, pos)
+        while cars[i] is not car:
+            i += 1
+        return positions, cars, i
+    
+    def add(self, car):
+        """Insert a newly spawned car"""
+        lane_id = self.lane_of(car)
+        pos = car.travel_position()
+        positions, cars = self.lanes.setdefault(lane_id, ([], []))
+        i = bisect_right(positions, pos)
+        positions.insert(i, pos)
+        cars.insert(i, car)
+        self.entries[car.id] = (lane_id, pos)
+    
+    def remove(self, car):
+        """Drop a despawned car"""
+        if car.id not in self.entries:
+            return
+        positions, cars, i = self._locate(car)
+        del positions[i]
+        del cars[i]
+        lane_id, _ = self.entries.pop(car.id)
+        if not cars:
+            del self.lanes[lane_id]
+    
+    def update(self, car):
+        """Re-file a car after it moved or turned"""
+        lane_id, _ = self.entries[car.id]
+        new_lane = self.lane_of(car)
+        pos = car.travel_position()
+        
+        if new_lane == lane_id:
+            positions, cars, i = self._locate(car)
+            # Cars rarely overtake, so usually the slot stays valid
+            if ((i == 0 or positions[i - 1] <= pos) and
+                    (i + 1 == len(cars) or pos <= positions[i + 1])):
+                positions[i] = pos
+                self.entries[car.id] = (lane_id, pos)
+                return
+        
+        self.remove(car)
+        self.add(car)
+    
+    def leader(self, car):
+        """Closest car strictly ahead of car in the same lane"""
+        lane_id, pos = self.entries[car.id]
+        positions, cars = self.lanes[lane_id]
+        i = bisect_right(positions, pos)
+        if i < len(cars):
+            return cars[i]
+        return None
+
+# ================= INTERSECTION OCCUPANCY =================
+class IntersectionOccupancy:
+    """Straight cars inside the intersection box, keyed by spawn direction"""
+    def __init__(self):
+        self.inside = [set() for _ in DIRECTIONS]   # indexed by direction code
+        self.count = 0
+    
+    def update(self, car):
+        """Refresh a car's membership after it spawned or moved"""
+        if car.lane_code != STRAIGHT:
+            return
+        
+        # in_intersection only looks at the car's centre, so the w/h swap
+        # on turning never changes membership
+        members = self.inside[car.spawn_code]
+        if car.in_intersection():
+            if car.id not in members:
+                members.add(car.id)
+                self.count += 1
+        elif car.id in members:
+            members.discard(car.id)
+            self.count -= 1
+    
+    def remove(self, car):
+        """Forget a despawned car"""
+        members = self.inside[car.spawn_code]
+        if car.id in members:
+            members.discard(car.id)
+            self.count -= 1
+    
+    def blocked_for(self, car):
+        """True if a straight car from another direction is inside"""
+        return self.count - len(self.inside[car.spawn_code]) > 0
 
 # ================= TRAFFIC MANAGER =================
 class TrafficManager:
-    def __init__(self):
+    def __init__(self, input_file="input.txt", rng=None, offset_file=None, config=None):
+        config = config or {}
+        unknown = set(config) - set(DEFAULT_CONFIG)
+        if unknown:
+            raise ValueError(f"unknown config keys: {sorted(unknown)}")
+        self.config = {**DEFAULT_CONFIG, **config}
+        self.rng = rng if rng is not None else random
         self.cars = []
+        self.lane_index = LaneIndex(self.get_lane_id)
+        self.occupancy = IntersectionOccupancy()
         self.car_id_counter = 0
-        self.lane_queues = {"up": [], "down": [], "left": [], "right": []}
+        # Insertion-ordered dicts (car.id -> car): O(1) membership/removal, FIFO order
+        self.lane_queues = {"up": {}, "down": {}, "left": {}, "right": {}}
+        # Straight cars that could not move last tick, per direction (the
+        # controllers' "approach" counts; lane_queues only holds the lead car)
+        self.waiting = dict.fromkeys(self.lane_queues, 0)
+        # Per-spawn-direction wait times, throughput and max queue length
+        self.stats = TrafficStats(list(self.lane_queues))
         self.current_green = "up"
+        self.green_since = 0
+        self.controller = make_controller(self.config["controller"], CYCLE_ORDER, {
+            "time_per_vehicle": self.config["time_per_car"],
+            "min_green": self.config["min_duration"],
+            "max_green": self.config["max_green"],
+            "startup_buffer": self.config["startup_buffer"],
+            "gap": self.config["gap_time"],
+            "period": self.config["pressure_period"],
+            "priority_phase": self.config["priority_lane"],
+            "priority_threshold": self.config["priority_threshold"],
+            "priority_release": self.config["priority_release"],
+            "priority_extra": PRIORITY_EXTRA,
+        }, print if self.config["verbose"] else None, self.config["downstream"])
         self.last_switch_time = 0
-        self.next_switch_duration = MIN_DURATION
+        self.next_switch_duration = self.config["min_duration"]
         self.tick_count = 0
+        self.profiler = None  # see enable_profiling()
+        # Called with a car's direction of travel when it leaves the screen
+        # (network.py uses it to hand the car on to the next intersection)
+        self.on_exit = None
+        self.snapshots = deque(maxlen=SNAPSHOT_HISTORY)
         
-        # Initialize file reading
-        if not os.path.exists("input.txt"):
-            with open("input.txt", "w") as f:
-                f.write("")
-        
-        self.file_handle = open("input.txt", "r")
-        self.file_handle.seek(0, 2)  # Go to end of file
+        # Initialize file reading (None = cars only arrive through spawn_car).
+        # Starts at the end of the file unless offset_file has a checkpoint.
+        self.reader = None
+        if input_file is not None:
+            self.reader = TailReader(input_file, offset_file, start_at_end=True)
     
     def read_generator(self):
         """Read new vehicle data from input.txt"""
-        lines = self.file_handle.readlines()
+        if self.reader is None:
+            return
+        lines = self.reader.read_lines()
         for line in lines:
             line = line.strip()
             if line and ',' in line:
@@ -185,57 +367,38 @@ class TrafficManager:
                 direction = parts[0].strip()
                 lane_type = parts[1].strip()
                 
-                # Create new car
-                new_car = CarLogic(self.car_id_counter, direction, lane_type)
-                self.cars.append(new_car)
-                self.car_id_counter += 1
+                self.spawn_car(direction, lane_type)
+    
+    def spawn_car(self, direction, lane_type):
+        """Create a new car at the edge of the screen and return it
+
+        Unknown lane types drive straight; an unknown direction gives None.
+        """
+        if direction not in DIRECTION_CODES:
+            return None
+        new_car = CarLogic(self.car_id_counter, direction, lane_type, self.rng)
+        new_car.spawned_at = self.tick_count * TICK_MS
+        self.cars.append(new_car)
+        self.lane_index.add(new_car)
+        self.occupancy.update(new_car)
+        self.car_id_counter += 1
+        return new_car
     
     def get_lane_id(self, car):
         """Get lane identifier for car"""
-        if car.current_direction in ["up", "down"]:
-            return (car.current_direction, round(car.x / 15) * 15)
+        code = car.current_code
+        if code < LEFT:
+            return (code, round(car.x / 15) * 15)
         else:
-            return (car.current_direction, round(car.y / 15) * 15)
+            return (code, round(car.y / 15) * 15)
     
     def find_car_ahead(self, car):
         """Find the car directly in front"""
-        lane_id = self.get_lane_id(car)
-        closest = None
-        min_dist = float('inf')
-        
-        for other in self.cars:
-            if other == car or self.get_lane_id(other) != lane_id:
-                continue
-            
-            dist = 0
-            if car.current_direction == "up":
-                dist = car.y - other.y
-            elif car.current_direction == "down":
-                dist = other.y - car.y
-            elif car.current_direction == "right":
-                dist = other.x - car.x
-            elif car.current_direction == "left":
-                dist = car.x - other.x
-            
-            if 0 < dist < min_dist:
-                min_dist = dist
-                closest = other
-        
-        return closest
+        return self.lane_index.leader(car)
     
     def is_intersection_blocked(self, car):
         """Check if intersection is blocked by other straight cars"""
-        for other in self.cars:
-            if other == car:
-                continue
-            
-            if other.lane_type == "turn":
-                continue
-            
-            if other.in_intersection():
-                if other.spawn_direction != car.spawn_direction:
-                    return True
-        return False
+        return self.occupancy.blocked_for(car)
     
     def can_move(self, car, front_car):
         """Determine if car can move forward"""
@@ -248,19 +411,14 @@ class TrafficManager:
             return True
         
         # Calculate distance to stop line
-        dist = 0
-        if car.current_direction == "up":
-            dist = car.y - STOP_UP
-        elif car.current_direction == "down":
-            dist = STOP_DOWN - car.y
-        elif car.current_direction == "right":
-            dist = STOP_RIGHT - car.x
-        elif car.current_direction == "left":
-            dist = car.x - STOP_LEFT
+        code = car.current_code
+        vertical = code < LEFT
+        position = (car.y if vertical else car.x) * SIGNS[code]
+        dist = STOP_AT[code] - position
         
         # Traffic light check (straight cars only)
-        if car.lane_type == "straight":
-            is_green = (car.current_direction == self.current_green)
+        if car.lane_code == STRAIGHT:
+            is_green = (DIRECTIONS[code] == self.current_green)
             
             if not is_green and 0 <= dist <= GAP:
                 self.add_to_queue(car)
@@ -273,15 +431,7 @@ class TrafficManager:
         
         # Front car collision check
         if front_car:
-            gap = 0
-            if car.current_direction == "up":
-                gap = car.y - front_car.y
-            elif car.current_direction == "down":
-                gap = front_car.y - car.y
-            elif car.current_direction == "right":
-                gap = front_car.x - car.x
-            elif car.current_direction == "left":
-                gap = car.x - front_car.x
+            gap = (front_car.y if vertical else front_car.x) * SIGNS[code] - position
             
             if 0 < gap < GAP:
                 return False
@@ -291,91 +441,121 @@ class TrafficManager:
     
     def add_to_queue(self, car):
         """Add car to waiting queue"""
-        if not car.in_queue and car.lane_type == "straight":
-            if car not in self.lane_queues[car.current_direction]:
-                self.lane_queues[car.current_direction].append(car)
+        if not car.in_queue and car.lane_code == STRAIGHT:
+            queue = self.lane_queues[DIRECTIONS[car.current_code]]
+            if car.id not in queue:
+                queue[car.id] = car
                 car.in_queue = True
+                car.queued_at = self.tick_count * TICK_MS
     
     def remove_from_queue(self, car):
         """Remove car from waiting queue"""
         if car.in_queue:
-            try:
-                self.lane_queues[car.current_direction].remove(car)
+            if self.lane_queues[DIRECTIONS[car.current_code]].pop(car.id, None) is not None:
                 car.in_queue = False
-            except ValueError:
-                pass
+                car.released_at = self.tick_count * TICK_MS
+                car.waited += car.released_at - car.queued_at
+    
+    def queue_head(self, direction):
+        """Id of the car at the front of a lane queue (None if empty)"""
+        return next(iter(self.lane_queues[direction]), None)
     
     def update_traffic_lights(self):
-        """Smart traffic light controller"""
+        """Ask the signal controller for the next phase when this one runs out"""
         self.tick_count += 1
+        now = self.tick_count * TICK_MS
         
         # Check if it's time to switch
-        if self.tick_count * 30 < self.last_switch_time + self.next_switch_duration:
+        if now < self.last_switch_time + self.next_switch_duration:
             return
         
-        # Time to switch!
-        priority_count = len(self.lane_queues[PRIORITY_LANE])
-        
-        # Priority logic
-        if priority_count > PRIORITY_THRESHOLD:
-            if self.current_green != PRIORITY_LANE:
-                self.current_green = PRIORITY_LANE
-                self.next_switch_duration = (priority_count * TIME_PER_CAR) + 2000
-                print(f"⚠️ PRIORITY MODE: {priority_count} cars in {PRIORITY_LANE.upper()}")
-            else:
-                if priority_count < PRIORITY_RELEASE:
-                    order = ["up", "left", "down", "right"]
-                    idx = order.index(self.current_green)
-                    self.current_green = order[(idx + 1) % 4]
-                    self.next_switch_duration = MIN_DURATION
-                    print(f"✓ Priority cleared, resuming normal cycle")
-                else:
-                    self.next_switch_duration = TIME_PER_CAR * 3
+        if self.controller.counts == "stop_line":
+            queues = {direction: len(queue) for direction, queue in self.lane_queues.items()}
         else:
-            
-            order = ["up", "left", "down", "right"]
-            idx = order.index(self.current_green)
-            self.current_green = order[(idx + 1) % 4]
-            
-            waiting_cars = len(self.lane_queues[self.current_green])
-            needed_time = waiting_cars * TIME_PER_CAR
-            
-            if waiting_cars > 0:
-                self.next_switch_duration = max(MIN_DURATION, needed_time + STARTUP_BUFFER)
-            else:
-                self.next_switch_duration = MIN_DURATION
-        
-        self.last_switch_time = self.tick_count * 30
+            queues = dict(self.waiting)
+        green, duration = self.controller.decide(queues, self.current_green,
+                                                 now - self.green_since)
+        if green != self.current_green:
+            self.current_green = green
+            self.green_since = now
+        self.next_switch_duration = duration
+        self.last_switch_time = now
     
     def update(self):
         """Main update loop - called every frame"""
+        if self.profiler is not None:
+            self.profiler.frame(self)
+            return
+        
         # Read new cars from generator
         self.read_generator()
         
         # Update traffic lights
         self.update_traffic_lights()
         
-        # Move cars
-        for car in self.cars[:]:
+        # Move cars, then drop the ones that left the screen
+        self.cull(self.move_cars())
+    
+    def move_cars(self):
+        """Advance every car that can move; returns the ids that left the screen"""
+        departed = set()
+        waiting = [0, 0, 0, 0]
+        for car in self.cars:
             front = self.find_car_ahead(car)
             
             if self.can_move(car, front):
                 car.move()
+                self.lane_index.update(car)
+                self.occupancy.update(car)
                 
                 # Mark as passed
-                if car.current_direction == "up" and car.y < INTERSECTION['y1'] - 30:
-                    car.passed = True
-                elif car.current_direction == "down" and car.y > INTERSECTION['y2'] + 30:
-                    car.passed = True
-                elif car.current_direction == "right" and car.x > INTERSECTION['x2'] + 30:
-                    car.passed = True
-                elif car.current_direction == "left" and car.x < INTERSECTION['x1'] - 30:
+                if car.travel_position() > PASSED_AT[car.current_code]:
                     car.passed = True
+            elif car.lane_code == STRAIGHT:
+                waiting[car.current_code] += 1
             
-            # Remove off-screen cars
+            # Remove off-screen cars (from the indexes right away, so cars
+            # behind no longer see them this tick)
             if car.off_screen():
                 self.remove_from_queue(car)
-                self.cars.remove(car)
+                self.lane_index.remove(car)
+                self.occupancy.remove(car)
+                departed.add(car.id)
+                car.despawned_at = self.tick_count * TICK_MS
+                self.stats.record_wait(DIRECTIONS[car.spawn_code], car.delay() / 1000,
+                                       car.despawned_at / 1000)
+                if self.on_exit is not None:
+                    self.on_exit(DIRECTIONS[car.current_code])
+        
+        self.waiting = dict(zip(DIRECTIONS, waiting))
+        return departed
+    
+    def cull(self, departed):
+        """Drop departed cars from the car list; returns how many left"""
+        if departed:
+            self.cars = [car for car in self.cars if car.id not in departed]
+        for direction, queue in self.lane_queues.items():
+            self.stats.observe_queue(direction, len(queue))
+        return len(departed)
+    
+    # ----- profiling -----
+    def enable_profiling(self, window=1000, dump_every=None, dump_path=None):
+        """Time every update() stage and count hot-path calls (see get_metrics)"""
+        self.disable_profiling()
+        self.profiler = FrameProfiler(window, dump_every, dump_path, TICK_MS)
+        self.profiler.attach(self)
+        return self.profiler
+    
+    def disable_profiling(self):
+        if self.profiler is not None:
+            self.profiler.detach(self)
+            self.profiler = None
+    
+    def get_metrics(self):
+        """Stage timings, rolling frame histogram and counters (None if not profiling)"""
+        if self.profiler is None:
+            return None
+        return self.profiler.metrics()
     
     def get_state(self):
         """Return current state for visualizer"""
@@ -385,6 +565,36 @@ class TrafficManager:
             "queues": {k: len(v) for k, v in self.lane_queues.items()}
         }
     
+    def pack_cars(self):
+        """Every car as packed records (bytes, see snapshot.py)"""
+        from snapshot import pack_cars
+        return pack_cars(self.cars)
+    
+    def snapshot(self, since=None):
+        """Immutable packed state of this frame (frame = tick_count)
+        
+        With since=<an earlier frame>, returns a SnapshotDiff with only the
+        spawned, moved and despawned cars; if that frame is no longer kept
+        (SNAPSHOT_HISTORY), the diff has reset=True and lists every car.
+        Repeated calls within one frame pack the cars only once.
+        """
+        from snapshot import PackedCars, Snapshot, diff
+        latest = self.snapshots[-1] if self.snapshots else None
+        if latest is None or latest.frame != self.tick_count:
+            latest = Snapshot(self.tick_count, self.current_green,
+                              {k: len(v) for k, v in self.lane_queues.items()},
+                              PackedCars(self.pack_cars()))
+            self.snapshots.append(latest)
+        if since is None:
+            return latest
+        old = next((old for old in self.snapshots if old.frame == since), None)
+        return diff(old, latest)
+    
+    def get_stats(self):
+        """Wait times (s) per spawn direction, throughput and max queue so far"""
+        return self.stats.summary(self.tick_count * TICK_MS / 1000)
+    
     def close(self):
         """Cleanup resources"""
-        self.file_handle.close()
\ No newline at end of file
+        if self.reader is not None:
+            self.reader.close()
\ No newline at end of file
@@ -0,0 +1,390 @@
+import numpy as np
+
+from traffic_manager import (
+    TrafficManager, WIDTH, HEIGHT, INTERSECTION, CAR_SPEED, GAP, TICK_MS,
+    VERT_LEFT, VERT_MIDDLE, VERT_RIGHT, HORZ_TOP, HORZ_MIDDLE, HORZ_BOTTOM,
+    STOP_UP, STOP_DOWN, STOP_RIGHT, STOP_LEFT,
+    UP, DOWN, LEFT, RIGHT, DIRECTIONS, DIRECTION_CODES, STRAIGHT, LANE_TYPES, LANE_CODES,
+    COLORS, CarView, FREE_FLOW_MS
+)
+
+# ================= CODES & TABLES =================
+# (direction, lane_type) -> (x, y, w, h, target_lane)
+SPAWN = {
+    ("up", "turn"): (VERT_LEFT, HEIGHT + 40, 22, 30, HORZ_BOTTOM),
+    ("up", "straight"): (VERT_MIDDLE, HEIGHT + 40, 22, 30, 0),
+    ("down", "turn"): (VERT_RIGHT, -40, 22, 30, HORZ_TOP),
+    ("down", "straight"): (VERT_MIDDLE, -40, 22, 30, 0),
+    ("right", "turn"): (-40, HORZ_TOP, 30, 22, VERT_LEFT),
+    ("right", "straight"): (-40, HORZ_MIDDLE, 30, 22, 0),
+    ("left", "turn"): (WIDTH + 40, HORZ_BOTTOM, 30, 22, VERT_RIGHT),
+    ("left", "straight"): (WIDTH + 40, HORZ_MIDDLE, 30, 22, 0),
+}
+
+# Indexed by direction code
+SIGN = np.array([-1, 1, -1, 1])                     # travel position = coord * sign
+STEP_X = np.array([0, 0, -CAR_SPEED, CAR_SPEED])
+STEP_Y = np.array([-CAR_SPEED, CAR_SPEED, 0, 0])
+TURN_TO = np.array([LEFT, RIGHT, DOWN, UP])         # spawn direction -> after turning
+STOP_AT = np.array([-STOP_UP, STOP_DOWN, -STOP_LEFT, STOP_RIGHT])
+PASSED_AT = np.array([
+    -(INTERSECTION['y1'] - 30), INTERSECTION['y2'] + 30,
+    -(INTERSECTION['x1'] - 30), INTERSECTION['x2'] + 30
+])
+FREE_FLOW = np.array(FREE_FLOW_MS)                   # [direction, turn] -> ms
+
+# Packed lane key: (lane << POS_BITS) + travel position + POS_OFFSET
+POS_BITS = 21
+POS_OFFSET = 1 << (POS_BITS - 1)
+
+
+# ================= VECTOR HELPERS =================
+def lane_keys(cur, x, y):
+    """Packed lane id + travel position for every car (same as get_lane_id)"""
+    vertical = cur < LEFT
+    across = np.where(vertical, x, y)
+    along = np.where(vertical, y, x) * SIGN[cur]
+    lane = cur.astype(np.int64) * 4096 + np.rint(across / 15).astype(np.int64) + 2048
+    return (lane << POS_BITS) + along + POS_OFFSET, along
+
+
+def in_intersection(x, y):
+    """Vectorized CarLogic.in_intersection"""
+    buffer = 10
+    return ((INTERSECTION['x1'] - buffer < x) & (x < INTERSECTION['x2'] + buffer) &
+            (INTERSECTION['y1'] - buffer < y) & (y < INTERSECTION['y2'] + buffer))
+
+
+def off_screen(x, y):
+    """Vectorized CarLogic.off_screen"""
+    return (x < -60) | (x > WIDTH + 60) | (y < -60) | (y > HEIGHT + 60)
+
+
+def nearest_ahead(keys, owners, cars, query, limit, visible):
+    """Smallest sorted key above each car's query key that it may see
+
+    limit holds the best key found so far per car (candidates at or past it
+    are ignored) and is updated in place and returned.
+    """
+    pending = cars
+    slot = np.searchsorted(keys, query[cars], side="right")
+    while pending.size:
+        live = slot < len(keys)
+        pending, slot = pending[live], slot[live]
+        closer = keys[slot] < limit[pending]
+        pending, slot = pending[closer], slot[closer]
+
+        seen = visible(owners[slot], pending)
+        limit[pending[seen]] = keys[slot[seen]]
+        pending, slot = pending[~seen], slot[~seen] + 1
+
+    return limit
+
+# ================= MOVE STEP =================
+class MoveStep:
+    """One tick's move decisions for every car, resolved in list order
+
+    The object engine moves cars one at a time, so a car sees the new
+    position of every car updated before it in the same frame and the old
+    position of every car after it.  Each decision therefore only depends on
+    decisions earlier in the list; resolve() iterates to that fixed point,
+    re-checking only the cars a flipped decision can affect.
+    """
+    def __init__(self, manager):
+        self.manager = manager
+        self.post = manager.advance()
+        px, py, _, _, pcur, _ = self.post
+
+        self.pre_key, pre_along = lane_keys(manager.cur, manager.x, manager.y)
+        self.post_key, self.post_along = lane_keys(pcur, px, py)
+        self.lane_end = ((self.pre_key >> POS_BITS) + 1) << POS_BITS
+        self.gone = off_screen(px, py)
+        self.pre_inside = in_intersection(manager.x, manager.y)
+        self.post_inside = in_intersection(px, py) & ~self.gone
+
+        self.pre_order = np.argsort(self.pre_key, kind="stable")
+        self.sorted_pre = self.pre_key[self.pre_order]
+
+        # Decisions that only depend on the car itself
+        self.free = manager.passed | self.pre_inside
+        dist = STOP_AT[manager.cur] - pre_along
+        self.at_line = ~manager.turn & (dist >= 0) & (dist <= GAP)
+        green = DIRECTION_CODES[manager.current_green]
+        self.red = ~self.free & self.at_line & (manager.cur != green)
+        self.undecided = ~self.free & ~self.red
+
+    def resolve(self):
+        """Return the boolean mask of cars that move this tick"""
+        moved = self.free.copy()
+        checked = np.flatnonzero(self.undecided)
+        while checked.size:
+            flipped = checked[self.can_move(checked, moved) != moved[checked]]
+            if not flipped.size:
+                break
+            moved[flipped] = ~moved[flipped]
+            checked = self.dependants(flipped)
+        return moved
+
+    def can_move(self, cars, moved):
+        """can_move for the undecided cars, given the current guess"""
+        stuck = self.leader_gaps(cars, moved) < GAP
+        line = self.at_line[cars]
+        if line.any():
+            stuck[line] |= self.blocked(cars[line], moved)
+        return ~stuck
+
+    def leader_gaps(self, cars, moved):
+        """Gap from each of cars to the car ahead of it"""
+        # New positions of cars that moved earlier in the list
+        movers = np.flatnonzero(moved & ~self.gone)
+        movers = movers[np.argsort(self.post_key[movers], kind="stable")]
+        ahead = nearest_ahead(
+            self.post_key[movers], movers, cars, self.pre_key, self.lane_end.copy(),
+            lambda owner, car: owner < car
+        )
+
+        # Old positions of everyone else, unless farther than the above
+        ahead = nearest_ahead(
+            self.sorted_pre, self.pre_order, cars, self.pre_key, ahead,
+            lambda owner, car: (owner != car) & (~moved[owner] | (owner > car))
+        )
+
+        return np.where(ahead[cars] < self.lane_end[cars],
+                        ahead[cars] - self.pre_key[cars], np.iinfo(np.int64).max)
+
+    def blocked(self, cars, moved):
+        """is_intersection_blocked for cars"""
+        manager = self.manager
+        box = np.flatnonzero(~manager.turn & (self.pre_inside | self.post_inside))
+        if not box.size:
+            return np.zeros(len(cars), dtype=bool)
+
+        now = np.where(moved[box], self.post_inside[box], self.pre_inside[box])
+        earlier = box[None, :] < cars[:, None]
+        seen = np.where(earlier, now, self.pre_inside[box])
+        other = manager.spawn[box][None, :] != manager.spawn[cars][:, None]
+        return (seen & other).any(axis=1)
+
+    def dependants(self, flipped):
+        """Undecided cars whose can_move may change when flipped cars change"""
+        # Cars up to GAP behind a flipped car's old or new position
+        n = len(self.pre_key)
+        keys = np.concatenate([self.pre_key[flipped], self.post_key[flipped]])
+        lo = np.searchsorted(self.sorted_pre, keys - GAP, side="right")
+        hi = np.searchsorted(self.sorted_pre, keys, side="left")
+        covered = np.cumsum(np.bincount(lo, minlength=n + 1) - np.bincount(hi, minlength=n + 1))
+        near = np.zeros(n, dtype=bool)
+        near[self.pre_order] = covered[:n] > 0
+
+        # Everyone at a stop line if a flipped car is in the intersection
+        straight = ~self.manager.turn[flipped]
+        if (straight & (self.pre_inside[flipped] | self.post_inside[flipped])).any():
+            near |= self.at_line
+
+        return np.flatnonzero(near & self.undecided)
+
+# ================= VECTOR TRAFFIC MANAGER =================
+class VectorTrafficManager(TrafficManager):
+    """TrafficManager that keeps every car in NumPy arrays (struct of arrays)
+
+    Cars are moved, turned, marked passed and culled in one vectorized step
+    per tick (see MoveStep), giving the same results as the object engine.
+    """
+    def __init__(self, input_file="input.txt", rng=None, offset_file=None, config=None):
+        super().__init__(input_file, rng, offset_file, config)
+        self.pending = []
+        self.ids = np.zeros(0, dtype=np.int64)
+        self.x = np.zeros(0, dtype=np.int64)
+        self.y = np.zeros(0, dtype=np.int64)
+        self.w = np.zeros(0, dtype=np.int64)
+        self.h = np.zeros(0, dtype=np.int64)
+        self.target = np.zeros(0, dtype=np.int64)
+        self.cur = np.zeros(0, dtype=np.int8)
+        self.spawn = np.zeros(0, dtype=np.int8)
+        self.color = np.zeros(0, dtype=np.int8)
+        self.turn = np.zeros(0, dtype=bool)
+        self.turned = np.zeros(0, dtype=bool)
+        self.passed = np.zeros(0, dtype=bool)
+        self.in_queue = np.zeros(0, dtype=bool)
+        self.queue_seq = np.zeros(0, dtype=np.int64)
+        self.queue_counter = 0
+        # Virtual timestamps in ms, as on CarLogic (despawn time is the cull tick)
+        self.spawned_at = np.zeros(0, dtype=np.int64)
+        self.queued_at = np.zeros(0, dtype=np.int64)
+        self.released_at = np.zeros(0, dtype=np.int64)
+        self.waited = np.zeros(0, dtype=np.int64)
+
+    def spawn_car(self, direction, lane_type):
+        """Queue a new car; it joins the arrays at the start of the next update
+
+        Like TrafficManager.spawn_car, unknown lane types drive straight and
+        an unknown direction gives None.  Returns a CarView of the new car
+        (there is no CarLogic to hand back), so .id and the spawn position
+        read the same as on the object engine's car.
+        """
+        if direction not in DIRECTION_CODES:
+            return None
+        lane_type = LANE_TYPES[LANE_CODES.get(lane_type, STRAIGHT)]
+        color = self.rng.choice(range(len(COLORS)))
+        car_id = self.car_id_counter
+        self.pending.append((car_id, direction, lane_type, color, self.tick_count * TICK_MS))
+        self.car_id_counter += 1
+        x, y, w, h, _ = SPAWN[(direction, lane_type)]
+        return CarView(car_id, x, y, w, h, COLORS[color], lane_type, direction,
+                       False, False, False)
+
+    def add_cars(self, rows):
+        """Append (car_id, direction, lane_type, color_index, spawned_at) rows"""
+        spawn = np.array([SPAWN[(d, t)] for _, d, t, _, _ in rows], dtype=np.int64)
+        codes = np.array([DIRECTION_CODES[d] for _, d, _, _, _ in rows], dtype=np.int8)
+        count = len(rows)
+
+        self.ids = np.concatenate([self.ids, [r[0] for r in rows]])
+        self.x = np.concatenate([self.x, spawn[:, 0]])
+        self.y = np.concatenate([self.y, spawn[:, 1]])
+        self.w = np.concatenate([self.w, spawn[:, 2]])
+        self.h = np.concatenate([self.h, spawn[:, 3]])
+        self.target = np.concatenate([self.target, spawn[:, 4]])
+        self.cur = np.concatenate([self.cur, codes])
+        self.spawn = np.concatenate([self.spawn, codes])
+        self.color = np.concatenate([self.color, np.array([r[3] for r in rows], dtype=np.int8)])
+        self.turn = np.concatenate([self.turn, [r[2] == "turn" for r in rows]])
+        self.turned = np.concatenate([self.turned, np.zeros(count, dtype=bool)])
+        self.passed = np.concatenate([self.passed, np.zeros(count, dtype=bool)])
+        self.in_queue = np.concatenate([self.in_queue, np.zeros(count, dtype=bool)])
+        self.queue_seq = np.concatenate([self.queue_seq, np.zeros(count, dtype=np.int64)])
+        self.spawned_at = np.concatenate([self.spawned_at, [r[4] for r in rows]])
+        self.queued_at = np.concatenate([self.queued_at, np.zeros(count, dtype=np.int64)])
+        self.released_at = np.concatenate([self.released_at, np.zeros(count, dtype=np.int64)])
+        self.waited = np.concatenate([self.waited, np.zeros(count, dtype=np.int64)])
+
+    def advance(self):
+        """Position of every car if it moves this tick (turn, then step)"""
+        x, y = self.x.copy(), self.y.copy()
+        w, h = self.w.copy(), self.h.copy()
+        cur, turned = self.cur.copy(), self.turned.copy()
+
+        spawn_vertical = self.spawn < LEFT
+        along = np.where(spawn_vertical, y, x) * SIGN[self.spawn]
+        turning = self.turn & ~turned & (along >= self.target * SIGN[self.spawn])
+
+        snap_y = turning & spawn_vertical
+        snap_x = turning & ~spawn_vertical
+        y[snap_y] = self.target[snap_y]
+        x[snap_x] = self.target[snap_x]
+        cur[turning] = TURN_TO[self.spawn[turning]]
+        w[turning], h[turning] = self.h[turning], self.w[turning]
+        turned |= turning
+
+        x += STEP_X[cur]
+        y += STEP_Y[cur]
+        return x, y, w, h, cur, turned
+
+    def move_cars(self):
+        """Advance every car that can move; returns the rows to keep (None if no cars)
+
+        update() itself is inherited: read_generator, update_traffic_lights,
+        then cull(move_cars()).  Pending spawns are flushed here, which is
+        equivalent to before the lights since those only read lane_queues.
+        """
+        if self.pending:
+            self.add_cars(self.pending)
+            self.pending = []
+
+        if len(self.ids) == 0:
+            self.waiting = dict.fromkeys(DIRECTIONS, 0)
+            return None
+
+        step = MoveStep(self)
+        moved = step.resolve()
+        stopped = np.bincount(self.cur[~moved & ~self.turn], minlength=len(DIRECTIONS))
+        self.waiting = dict(zip(DIRECTIONS, stopped.tolist()))
+        px, py, pw, ph, pcur, pturned = step.post
+        red, gone = step.red, step.gone
+
+        # Queue bookkeeping (add_to_queue / remove_from_queue)
+        now = self.tick_count * TICK_MS
+        joining = red & ~self.in_queue
+        self.queue_seq[joining] = self.queue_counter + np.arange(int(joining.sum()))
+        self.queue_counter += int(joining.sum())
+        self.queued_at[joining] = now
+        leaving = self.in_queue & moved
+        self.released_at[leaving] = now
+        self.waited[leaving] += now - self.queued_at[leaving]
+        self.in_queue = (self.in_queue | joining) & ~moved
+
+        # Apply moves and mark passed cars
+        self.x = np.where(moved, px, self.x)
+        self.y = np.where(moved, py, self.y)
+        self.w = np.where(moved, pw, self.w)
+        self.h = np.where(moved, ph, self.h)
+        self.cur = np.where(moved, pcur, self.cur).astype(np.int8)
+        self.turned = np.where(moved, pturned, self.turned)
+        self.passed |= moved & (step.post_along > PASSED_AT[pcur])
+
+        # Off-screen cars are dropped by cull()
+        return ~(moved & gone)
+
+    def cull(self, keep):
+        """Drop off-screen rows and rebuild the lane queues; returns how many left"""
+        if keep is None:
+            return 0
+        departed = int(len(keep) - keep.sum())
+        if departed:
+            now = self.tick_count * TICK_MS
+            gone = ~keep
+            # Delay as in CarLogic.delay(): time on screen beyond free flow
+            free = FREE_FLOW[self.spawn[gone], self.turn[gone].astype(np.int64)]
+            delay = np.maximum(0, now - self.spawned_at[gone] - free)
+            for spawn, waited in zip(self.spawn[gone].tolist(), delay.tolist()):
+                self.stats.record_wait(DIRECTIONS[spawn], waited / 1000, now / 1000)
+            if self.on_exit is not None:
+                for code in self.cur[gone]:
+                    self.on_exit(DIRECTIONS[code])
+            for name in ("ids", "x", "y", "w", "h", "target", "cur", "spawn", "color", "turn",
+                         "turned", "passed", "in_queue", "queue_seq", "spawned_at", "queued_at",
+                         "released_at", "waited"):
+                setattr(self, name, getattr(self, name)[keep])
+
+        self.rebuild_queues()
+        for direction, queue in self.lane_queues.items():
+            self.stats.observe_queue(direction, len(queue))
+        return departed
+
+    def rebuild_queues(self):
+        """Refresh lane_queues (car ids in FIFO order) from the in_queue flags"""
+        for code, direction in enumerate(DIRECTIONS):
+            waiting = np.flatnonzero(self.in_queue & (self.cur == code))
+            waiting = waiting[np.argsort(self.queue_seq[waiting], kind="stable")]
+            self.lane_queues[direction] = dict.fromkeys(self.ids[waiting].tolist())
+
+    def pack_cars(self):
+        """Packed records straight from the columns (no CarViews)"""
+        from snapshot import car_dtype, TURNED, PASSED, IN_QUEUE
+        records = np.zeros(len(self.ids), dtype=car_dtype())
+        records["id"] = self.ids
+        records["x"] = self.x
+        records["y"] = self.y
+        records["w"] = self.w
+        records["h"] = self.h
+        records["color"] = self.color
+        records["bits"] = (self.turn | self.cur.astype(np.uint8) << 1 | self.turned * TURNED |
+                           self.passed * PASSED | self.in_queue * IN_QUEUE)
+        return records.tobytes()
+
+    def get_state(self):
+        """Return current state for visualizer"""
+        cars = [
+            CarView(car_id, x, y, w, h, COLORS[color], "turn" if turn else "straight",
+                    DIRECTIONS[cur], turned, passed, in_queue)
+            for car_id, x, y, w, h, color, turn, cur, turned, passed, in_queue in zip(
+                self.ids.tolist(), self.x.tolist(), self.y.tolist(),
+                self.w.tolist(), self.h.tolist(), self.color.tolist(),
+                self.turn.tolist(), self.cur.tolist(), self.turned.tolist(),
+                self.passed.tolist(), self.in_queue.tolist())
+        ]
+        return {
+            "cars": cars,
+            "lights": self.current_green,
+            "queues": {k: len(v) for k, v in self.lane_queues.items()}
+        }
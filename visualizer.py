@@ -1,6 +1,18 @@
+import argparse
 import tkinter as tk
+from sim_thread import SimulationThread
 from traffic_manager import TrafficManager, WIDTH, HEIGHT, INTERSECTION
 
+parser = argparse.ArgumentParser(description="Tkinter view of the traffic simulation")
+parser.add_argument("--profile", action="store_true",
+                    help="print per-stage update() timings every 100 ticks")
+parser.add_argument("--speed", type=float, default=1.0,
+                    help="simulation speed relative to real time (0 = as fast as possible)")
+parser.add_argument("--fps", type=float, default=33, help="redraws per second")
+parser.add_argument("--no-interpolate", action="store_true",
+                    help="draw the latest tick as is instead of easing between ticks")
+args = parser.parse_args()
+
 # ================= WINDOW SETUP =================
 root = tk.Tk()
 root.title("Smart Queue-Based Traffic System")
@@ -14,9 +26,12 @@ CENTER_COLOR = "#5A5A5A"
 
 # Initialize Traffic Manager
 manager = TrafficManager()
+if args.profile:
+    # Print per-stage update() timings every 100 ticks
+    manager.enable_profiling(dump_every=100)
 
-# Dictionary to track visual objects: {car_id: (body_id, indicator_id)}
-visual_cars = {}
+# The simulation ticks on its own thread; the GUI samples its snapshots
+simulation = SimulationThread(manager, speed=args.speed)
 
 # Traffic light visual objects
 traffic_lights = {}
@@ -83,92 +98,137 @@ def create_traffic_lights():
 queue_text = canvas.create_text(10, 10, anchor="nw", text="", fill="white", 
                                 font=("Arial", 10, "bold"))
 
+# ================= RENDERER =================
+class CarSprite:
+    """Canvas items of one car slot and what they currently show"""
+    __slots__ = ("tag", "body", "indicator", "fill", "indicator_fill", "x", "y", "w", "h")
+
+    def __init__(self, tag, body, indicator):
+        self.tag = tag
+        self.body = body
+        self.indicator = indicator
+        self.fill = self.indicator_fill = ""
+        self.x = self.y = self.w = self.h = None
+
+
+class CanvasRenderer:
+    """Draws cars, lights and queue counts, touching only what changed
+
+    Each car is a body rectangle plus an indicator dot sharing one tag, so a
+    car that keeps its size moves with a single canvas.move call.  Sprites of
+    despawned cars are hidden and kept in a pool for the next spawns instead
+    of being deleted; the pool grows POOL_CHUNK sprites at a time.
+    """
+    POOL_CHUNK = 64
+
+    def __init__(self, canvas, lights, queue_text):
+        self.canvas = canvas
+        self.lights = lights
+        self.queue_text = queue_text
+        self.pool = []        # hidden CarSprites
+        self.drawn = {}       # car id -> CarSprite
+        self.created = 0
+        self.green = None
+        self.queues = None
+
+    def grow_pool(self):
+        create_rectangle = self.canvas.create_rectangle
+        create_oval = self.canvas.create_oval
+        for _ in range(self.POOL_CHUNK):
+            tag = f"car{self.created}"
+            self.created += 1
+            body = create_rectangle(0, 0, 0, 0, outline="white", width=1,
+                                    state="hidden", tags=tag)
+            indicator = create_oval(0, 0, 0, 0, outline="", state="hidden", tags=tag)
+            self.pool.append(CarSprite(tag, body, indicator))
+
+    def render(self, cars, green, queues):
+        self.render_lights(green)
+        self.render_queues(queues, green)
+        self.render_cars(cars)
+
+    def render_lights(self, green):
+        if green == self.green:
+            return
+        for direction in (self.green, green):
+            if direction in self.lights:
+                self.canvas.itemconfig(self.lights[direction],
+                                       fill="green" if direction == green else "red")
+        self.green = green
+
+    def render_queues(self, queues, green):
+        counts = [queues.get(direction, 0) for direction in ["up", "down", "left", "right"]]
+        if (counts, green) == self.queues:
+            return
+        self.queues = (counts, green)
+        text = "Queue Counts:\n"
+        for direction, count in zip(["up", "down", "left", "right"], counts):
+            indicator = " ← GREEN" if direction == green else ""
+            priority_mark = " [PRIORITY]" if direction == "up" else ""
+            text += f"{direction.upper()}: {count}{priority_mark}{indicator}\n"
+        self.canvas.itemconfig(self.queue_text, text=text)
+
+    def render_cars(self, cars):
+        move = self.canvas.move
+        drawn = self.drawn
+        seen = set()
+
+        for car in cars:
+            seen.add(car.id)
+            sprite = drawn.get(car.id)
+            if sprite is None:
+                if not self.pool:
+                    self.grow_pool()
+                sprite = drawn[car.id] = self.pool.pop()
+                self.show(sprite, car)
+                continue
+
+            x, y, w, h = car.x, car.y, car.w, car.h
+            if x == sprite.x and y == sprite.y and w == sprite.w and h == sprite.h:
+                continue   # stopped in a queue: nothing to redraw
+            if w == sprite.w and h == sprite.h:
+                move(sprite.tag, x - sprite.x, y - sprite.y)
+                sprite.x, sprite.y = x, y
+            else:
+                self.place(sprite, x, y, w, h)
+
+        # Hide despawned cars and return their sprites to the pool
+        for car_id in [car_id for car_id in drawn if car_id not in seen]:
+            sprite = drawn.pop(car_id)
+            self.canvas.itemconfig(sprite.tag, state="hidden")
+            self.pool.append(sprite)
+
+    def show(self, sprite, car):
+        """Dress a pooled sprite for a new car, skipping unchanged colours"""
+        indicator_fill = "orange" if car.lane_type == "turn" else "lightblue"
+        if sprite.fill != car.color:
+            self.canvas.itemconfig(sprite.body, fill=car.color)
+            sprite.fill = car.color
+        if sprite.indicator_fill != indicator_fill:
+            self.canvas.itemconfig(sprite.indicator, fill=indicator_fill)
+            sprite.indicator_fill = indicator_fill
+        self.place(sprite, car.x, car.y, car.w, car.h)
+        self.canvas.itemconfig(sprite.tag, state="normal")
+
+    def place(self, sprite, x, y, w, h):
+        self.canvas.coords(sprite.body, x - w/2, y - h/2, x + w/2, y + h/2)
+        self.canvas.coords(sprite.indicator, x - 4, y - 4, x + 4, y + 4)
+        sprite.x, sprite.y, sprite.w, sprite.h = x, y, w, h
+
 # ================= UPDATE FUNCTIONS =================
-def update_traffic_lights_display(green_direction):
-    """Update traffic light colors"""
-    for direction, light_id in traffic_lights.items():
-        if direction == green_direction:
-            canvas.itemconfig(light_id, fill="green")
-        else:
-            canvas.itemconfig(light_id, fill="red")
-
-def update_queue_display(queues, green_direction):
-    """Update queue count display"""
-    text = "Queue Counts:\n"
-    for direction in ["up", "down", "left", "right"]:
-        count = queues.get(direction, 0)
-        indicator = " ← GREEN" if direction == green_direction else ""
-        priority_mark = " [PRIORITY]" if direction == "up" else ""
-        text += f"{direction.upper()}: {count}{priority_mark}{indicator}\n"
-    canvas.itemconfig(queue_text, text=text)
+renderer = None
 
 def update_visuals():
-    """Main visualization update loop"""
-    # Get updated state from traffic manager
-    manager.update()
-    state = manager.get_state()
-    
-    # Update traffic lights
-    green_direction = state['lights']
-    update_traffic_lights_display(green_direction)
-    
-    # Update queue display
-    update_queue_display(state['queues'], green_direction)
-    
-    # Track current car IDs
-    current_car_ids = set()
-    
-    # Update or create cars
-    for car_logic in state['cars']:
-        current_car_ids.add(car_logic.id)
-        
-        if car_logic.id not in visual_cars:
-            # New car - create visual representation
-            body_id = canvas.create_rectangle(
-                car_logic.x - car_logic.w/2, car_logic.y - car_logic.h/2,
-                car_logic.x + car_logic.w/2, car_logic.y + car_logic.h/2,
-                fill=car_logic.color, outline="white", width=1
-            )
-            
-            # Indicator dot
-            indicator_color = "orange" if car_logic.lane_type == "turn" else "lightblue"
-            indicator_id = canvas.create_oval(
-                car_logic.x - 4, car_logic.y - 4,
-                car_logic.x + 4, car_logic.y + 4,
-                fill=indicator_color, outline=""
-            )
-            
-            visual_cars[car_logic.id] = (body_id, indicator_id)
-        else:
-            # Existing car - update position
-            body_id, indicator_id = visual_cars[car_logic.id]
-            
-            canvas.coords(
-                body_id,
-                car_logic.x - car_logic.w/2, car_logic.y - car_logic.h/2,
-                car_logic.x + car_logic.w/2, car_logic.y + car_logic.h/2
-            )
-            
-            canvas.coords(
-                indicator_id,
-                car_logic.x - 4, car_logic.y - 4,
-                car_logic.x + 4, car_logic.y + 4
-            )
-    
-    # Remove cars that no longer exist in logic
-    for car_id in list(visual_cars.keys()):
-        if car_id not in current_car_ids:
-            body_id, indicator_id = visual_cars[car_id]
-            canvas.delete(body_id)
-            canvas.delete(indicator_id)
-            del visual_cars[car_id]
+    """Main visualization update loop (runs at --fps, independent of the sim)"""
+    cars, lights, queues = simulation.sample(interpolated=not args.no_interpolate)
+    renderer.render(cars, lights, queues)
     
-    # Schedule next update (30ms = ~33 FPS)
-    root.after(30, update_visuals)
+    root.after(max(1, int(1000 / args.fps)), update_visuals)
 
 # ================= CLEANUP =================
 def on_closing():
     """Clean up resources when closing"""
+    simulation.stop()
     manager.close()
     root.destroy()
 
@@ -190,8 +250,10 @@ root.protocol("WM_DELETE_WINDOW", on_closing)
 # Draw static elements
 draw_static_background()
 create_traffic_lights()
+renderer = CanvasRenderer(canvas, traffic_lights, queue_text)
 
-# Start update loop
+# Start the simulation and the redraw loop
+simulation.start()
 update_visuals()
 
 # Start Tkinter main loop